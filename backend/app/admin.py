@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, HTTPException
+
+from .deps import require_admin
+from .loop_monitor import get_monitor
+from .media_scheduler import get_scheduler
+from .scratch import get_scratch
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/loop-lag")
+async def loop_lag(top: int = 10):
+    monitor = get_monitor()
+    if monitor is None:
+        raise HTTPException(status_code=404, detail="Loop monitor is disabled (set LOOP_MONITOR=1)")
+    return monitor.snapshot(top=top)
+
+
+@router.get("/media")
+async def media_stats():
+    return get_scheduler().stats()
+
+
+@router.get("/scratch")
+async def scratch_stats():
+    return get_scratch().stats()
@@ -0,0 +1,157 @@
+"""Batched, resumable data backfills for alembic revisions.
+
+A single ``UPDATE ... WHERE <predicate>`` over a big table holds its locks
+and its transaction for as long as the whole table takes, and a failure
+throws all of the work away. :class:`Backfill` walks the table in primary
+key order instead. It updates one key range per short transaction, and
+after each batch it records the last key in ``backfill_checkpoints``, so an
+interrupted run resumes where it stopped.
+
+The connection must be in autocommit mode, so that each batch commits on
+its own rather than inside one long transaction. In a revision that means
+running inside ``op.get_context().autocommit_block()``::
+
+    def upgrade():
+        with op.get_context().autocommit_block():
+            MY_BACKFILL.run(op.get_bind(), **backfill_options())
+
+The ``predicate`` must select exactly the rows that still need work. That
+makes a batch safe to repeat, which is what lets a resumed run redo the
+batch it was in the middle of. Checkpoints store the last key as text, so
+``key`` should be a string column, as all ids in this schema are.
+"""
+import logging
+import time
+from datetime import datetime
+from typing import Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+DEFAULT_BATCH_SIZE = 1000
+
+log = logging.getLogger("alembic.backfill")
+
+
+def backfill_options() -> dict:
+    """``batch_size``/``throttle``/``restart`` from ``alembic -x key=value`` arguments."""
+    from alembic import context
+
+    args = context.get_x_argument(as_dictionary=True)
+    return {
+        "batch_size": int(args.get("batch_size", DEFAULT_BATCH_SIZE)),
+        "throttle": float(args.get("throttle", 0)),
+        "restart": args.get("restart", "").lower() in ("1", "true", "yes"),
+    }
+
+
+class Backfill:
+    """``UPDATE <table> SET <assignments> WHERE <predicate>``, in keyset-ordered batches.
+
+    ``assignments`` and ``predicate`` are SQL fragments over the columns of
+    ``table``; ``key`` must be unique and indexed (normally the primary key).
+    """
+
+    def __init__(self, name: str, table: str, assignments: str, predicate: str, key: str = "id"):
+        self.name = name
+        self.table = table
+        self.assignments = assignments
+        self.predicate = predicate
+        self.key = key
+
+    def _checkpoint(self, connection: Connection):
+        return connection.execute(
+            text("SELECT last_key, rows_done, completed_at FROM backfill_checkpoints WHERE name = :name"),
+            {"name": self.name},
+        ).first()
+
+    def _save(self, connection: Connection, last_key, rows_done: int, completed: bool) -> None:
+        now = datetime.utcnow()
+        params = {
+            "name": self.name,
+            "last_key": None if last_key is None else str(last_key),
+            "rows_done": rows_done,
+            "updated_at": now,
+            "completed_at": now if completed else None,
+        }
+        updated = connection.execute(
+            text(
+                "UPDATE backfill_checkpoints SET last_key = :last_key, rows_done = :rows_done, "
+                "updated_at = :updated_at, completed_at = :completed_at WHERE name = :name"
+            ),
+            params,
+        )
+        if updated.rowcount == 0:
+            connection.execute(
+                text(
+                    "INSERT INTO backfill_checkpoints (name, last_key, rows_done, updated_at, completed_at) "
+                    "VALUES (:name, :last_key, :rows_done, :updated_at, :completed_at)"
+                ),
+                params,
+            )
+
+    def run(
+        self,
+        connection: Connection,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        throttle: float = 0.0,
+        restart: bool = False,
+        progress: Optional[Callable[[str], None]] = None,
+    ) -> int:
+        """Run or resume the backfill; returns the number of rows updated by this call.
+
+        ``throttle`` is a pause in seconds between batches, to leave I/O and
+        replication headroom for live traffic.
+        """
+        report = progress or log.info
+        batch_size = max(1, batch_size)
+
+        checkpoint = None if restart else self._checkpoint(connection)
+        if checkpoint is not None and checkpoint.completed_at is not None:
+            report(f"{self.name}: already completed ({checkpoint.rows_done} rows)")
+            return 0
+        last_key = checkpoint.last_key if checkpoint else None
+        rows_before = checkpoint.rows_done if checkpoint else 0
+        if last_key is not None:
+            report(f"{self.name}: resuming after {self.key}={last_key} ({rows_before} rows done)")
+
+        select_keys = (
+            f"SELECT {self.key} FROM {self.table} WHERE ({self.predicate}) {{after}} "
+            f"ORDER BY {self.key} LIMIT :limit"
+        )
+        update = (
+            f"UPDATE {self.table} SET {self.assignments} "
+            f"WHERE ({self.predicate}) {{after}} AND {self.key} <= :upper"
+        )
+        after = f"AND {self.key} > :lower"
+
+        rows = 0
+        started = time.monotonic()
+        while True:
+            bounds = {} if last_key is None else {"lower": last_key}
+            clause = "" if last_key is None else after
+            keys = connection.execute(
+                text(select_keys.format(after=clause)), {**bounds, "limit": batch_size}
+            ).scalars().all()
+            if not keys:
+                break
+
+            result = connection.execute(text(update.format(after=clause)), {**bounds, "upper": keys[-1]})
+            rows += max(result.rowcount, 0)
+            last_key = keys[-1]
+            self._save(connection, last_key, rows_before + rows, completed=False)
+
+            elapsed = time.monotonic() - started
+            report(f"{self.name}: {rows_before + rows} rows, {rows / elapsed if elapsed else 0:.0f} rows/s")
+            if len(keys) < batch_size:
+                break
+            if throttle:
+                time.sleep(throttle)
+
+        self._save(connection, last_key, rows_before + rows, completed=True)
+        elapsed = time.monotonic() - started
+        report(
+            f"{self.name}: done, {rows} rows in {elapsed:.1f}s "
+            f"({rows / elapsed if elapsed else 0:.0f} rows/s)"
+        )
+        return rows
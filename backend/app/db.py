@@ -1,28 +1,55 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, AsyncEngine
 from sqlalchemy.orm import sessionmaker, declarative_base
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
+from .config import load_env
 
-if not DATABASE_URL:
-    raise RuntimeError("DATABASE_URL not set in environment")
-
-engine = create_async_engine(
-    DATABASE_URL, 
-    echo=False, 
-    future=True,
-    connect_args={"ssl": True}
-)
-AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 Base = declarative_base()
 
+# Created on first use so importing the app needs neither credentials nor a
+# database; see get_engine().
+_engine: AsyncEngine | None = None
+_sessionmaker: sessionmaker | None = None
+
+
+def get_engine() -> AsyncEngine:
+    global _engine
+    if _engine is None:
+        load_env()
+        database_url = os.getenv("DATABASE_URL")
+        if not database_url:
+            raise RuntimeError("DATABASE_URL not set in environment")
+
+        _engine = create_async_engine(
+            database_url,
+            echo=False,
+            future=True,
+            connect_args={"ssl": True},
+        )
+    return _engine
+
+
+def get_sessionmaker() -> sessionmaker:
+    global _sessionmaker
+    if _sessionmaker is None:
+        _sessionmaker = sessionmaker(get_engine(), class_=AsyncSession, expire_on_commit=False)
+    return _sessionmaker
+
+
 async def get_db():
-    async with AsyncSessionLocal() as session:
+    async with get_sessionmaker()() as session:
         yield session
 
+
 async def init_db():
-    from . import models  
-    async with engine.begin() as conn:
+    from . import models
+    async with get_engine().begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+
+
+async def dispose_engine():
+    global _engine, _sessionmaker
+    if _engine is not None:
+        await _engine.dispose()
+    _engine = None
+    _sessionmaker = None
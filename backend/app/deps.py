@@ -1,4 +1,7 @@
-from fastapi import Depends, HTTPException
+import os
+import secrets
+
+from fastapi import Depends, Header, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -6,6 +9,7 @@ from sqlalchemy import select
 from .jwt_utils import decode_token
 from .models import User
 from .db import get_db
+from .config import load_env
 
 security = HTTPBearer()
 
@@ -25,3 +29,13 @@ async def get_current_user(
     if not user:
         raise HTTPException(status_code=401)
     return user
+
+
+async def require_admin(x_admin_token: str | None = Header(default=None)):
+    """Gate for the ``/admin`` diagnostics; disabled unless ``ADMIN_TOKEN`` is set."""
+    load_env()
+    expected = os.getenv("ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=404)
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, expected):
+        raise HTTPException(status_code=403, detail="Admin token required")
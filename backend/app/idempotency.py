@@ -0,0 +1,244 @@
+import asyncio
+import hashlib
+import json
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from .config import load_env
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+POLL_SECONDS = 0.5
+
+
+def _lease() -> timedelta:
+    """A running attempt renews its lease every third of it (see :meth:`Claim.held`).
+    One that stops renewing is presumed dead (node crashed or was redeployed)
+    and the next retry takes the key over once the lease runs out."""
+    load_env()
+    return timedelta(seconds=float(os.getenv("IDEMPOTENCY_LEASE_SECONDS", 900)))
+
+
+def _wait_seconds() -> float:
+    """How long a retry waits on an attempt that is still running before giving up."""
+    load_env()
+    return float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", 30))
+
+
+def _retention() -> timedelta:
+    """Completed keys are replayed for this long, then the key may be reused."""
+    load_env()
+    return timedelta(hours=float(os.getenv("IDEMPOTENCY_RETENTION_HOURS", 24)))
+
+
+def fingerprint(*parts) -> str:
+    """Stable hash of the request, so a key reused for a different request is caught."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, bytes):
+            part = json.dumps(part, sort_keys=True, default=str).encode()
+        digest.update(hashlib.sha256(part).digest())
+    return digest.hexdigest()
+
+
+def _utc(value: datetime) -> datetime:
+    """Naive UTC, whether the driver returned an aware (Postgres) or naive (SQLite) value."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _insert(db: AsyncSession):
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(IdempotencyKey)
+
+
+class Claim:
+    """Ownership of an idempotency key for the duration of one attempt."""
+
+    def __init__(self, row_id: str, owner: str):
+        self.row_id = row_id
+        self.owner = owner
+
+    async def complete(self, db: AsyncSession, status_code: int, body) -> None:
+        """Store the response. Call before the endpoint's final commit so the
+        result and the stored response are written in one transaction.
+
+        Raises 409 if another attempt has taken the key over in the meantime;
+        the caller's transaction must then be rolled back, not committed.
+        """
+        stored = await db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.id == self.row_id, IdempotencyKey.owner == self.owner)
+            .values(
+                status="completed",
+                response_status=status_code,
+                response_body=body,
+                completed_at=datetime.utcnow(),
+            )
+        )
+        if stored.rowcount != 1:
+            raise HTTPException(
+                status_code=409, detail=f"{HEADER} was taken over by another attempt"
+            )
+
+    async def _renew(self, bind: AsyncEngine, lease: timedelta) -> None:
+        async with AsyncSession(bind) as db:
+            while True:
+                await asyncio.sleep(lease.total_seconds() / 3)
+                try:
+                    renewed = await db.execute(
+                        update(IdempotencyKey)
+                        .where(
+                            IdempotencyKey.id == self.row_id,
+                            IdempotencyKey.owner == self.owner,
+                            IdempotencyKey.status == "in_progress",
+                        )
+                        .values(locked_until=datetime.utcnow() + lease)
+                    )
+                    await db.commit()
+                except Exception:
+                    # a missed renewal is retried on the next tick; the lease
+                    # only runs out after three in a row
+                    await db.rollback()
+                    continue
+                if renewed.rowcount != 1:
+                    return  # taken over or finished; complete() reports it
+
+    @asynccontextmanager
+    async def held(self, bind: AsyncEngine):
+        """Keep renewing the lease while the block runs.
+
+        Renewals use their own connection from ``bind``, since the request's
+        session is busy with the attempt itself.
+        """
+        renewer = asyncio.create_task(self._renew(bind, _lease()))
+        try:
+            yield self
+        finally:
+            renewer.cancel()
+            await asyncio.wait([renewer])
+
+    async def abandon(self, db: AsyncSession) -> None:
+        """Drop the key after a failed attempt so a retry runs the request again."""
+        await db.rollback()
+        await db.execute(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.id == self.row_id, IdempotencyKey.owner == self.owner
+            )
+        )
+        await db.commit()
+
+
+async def claim(
+    db: AsyncSession, key: str, user_id: str, scope: str, request_hash: str
+) -> Claim | JSONResponse:
+    """Claim ``key`` for this attempt, or return the stored response to replay.
+
+    Waits up to ``IDEMPOTENCY_WAIT_SECONDS`` while another attempt with the
+    same key is running, on this node or any other, and raises 409 if it
+    still has not finished. A key reused with a different request body is a 422.
+    """
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"{HEADER} must be 1-{MAX_KEY_LENGTH} characters")
+
+    lease, retention = _lease(), _retention()
+    deadline = asyncio.get_running_loop().time() + _wait_seconds()
+    while True:
+        now = datetime.utcnow()
+        owner = uuid4().hex
+        row_id = uuid4().hex
+        inserted = await db.execute(
+            _insert(db)
+            .values(
+                id=row_id,
+                user_id=user_id,
+                scope=scope,
+                key=key,
+                request_hash=request_hash,
+                status="in_progress",
+                owner=owner,
+                locked_until=now + lease,
+                created_at=now,
+            )
+            .on_conflict_do_nothing(index_elements=["user_id", "scope", "key"])
+        )
+        await db.commit()
+        if inserted.rowcount == 1:
+            return Claim(row_id, owner)
+
+        row = (
+            await db.execute(
+                select(
+                    IdempotencyKey.id,
+                    IdempotencyKey.request_hash,
+                    IdempotencyKey.status,
+                    IdempotencyKey.owner,
+                    IdempotencyKey.locked_until,
+                    IdempotencyKey.created_at,
+                    IdempotencyKey.response_status,
+                    IdempotencyKey.response_body,
+                ).where(
+                    IdempotencyKey.user_id == user_id,
+                    IdempotencyKey.scope == scope,
+                    IdempotencyKey.key == key,
+                )
+            )
+        ).first()
+        await db.commit()  # end the read so the next poll sees fresh rows
+        if row is None:
+            continue  # the other attempt failed and released the key
+
+        if row.status == "completed" and _utc(row.created_at) < now - retention:
+            await db.execute(delete(IdempotencyKey).where(IdempotencyKey.id == row.id))
+            await db.commit()
+            continue
+
+        if row.request_hash != request_hash:
+            raise HTTPException(
+                status_code=422, detail=f"{HEADER} was already used for a different request"
+            )
+
+        if row.status == "completed":
+            return JSONResponse(
+                status_code=row.response_status,
+                content=row.response_body,
+                headers={REPLAYED_HEADER: "true"},
+            )
+
+        if _utc(row.locked_until) < now:
+            # the attempt holding the key died; take it over if nobody beat us to it
+            taken = await db.execute(
+                update(IdempotencyKey)
+                .where(
+                    IdempotencyKey.id == row.id,
+                    IdempotencyKey.status == "in_progress",
+                    IdempotencyKey.owner == row.owner,
+                )
+                .values(owner=owner, locked_until=now + lease)
+            )
+            await db.commit()
+            if taken.rowcount == 1:
+                return Claim(row.id, owner)
+            continue
+
+        if asyncio.get_running_loop().time() >= deadline:
+            raise HTTPException(
+                status_code=409,
+                detail="A request with this Idempotency-Key is still in progress",
+                headers={"Retry-After": "1"},
+            )
+        await asyncio.sleep(POLL_SECONDS)
@@ -0,0 +1,161 @@
+import asyncio
+import bisect
+import os
+import sys
+import threading
+import time
+import traceback
+
+from .config import load_env
+
+# Upper bounds (ms) of the lag histogram buckets; the last bucket is open.
+LAG_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+STACK_DEPTH = 12
+
+
+class LoopMonitor:
+    """Samples event-loop lag and captures stacks of callbacks that block it.
+
+    A heartbeat task sleeps for ``interval`` seconds and records how late it
+    wakes up. A watchdog thread checks the heartbeat every half
+    ``threshold``; if the loop has not ticked for longer than ``threshold`` it
+    grabs the loop thread's current stack, which is the code that is
+    blocking it. Both wake a few dozen times per second at most, which is
+    cheap enough to leave on in production.
+    """
+
+    def __init__(self, interval: float = 0.05, threshold: float = 0.1, max_offenders: int = 50):
+        self.interval = interval
+        self.threshold = threshold
+        self.max_offenders = max_offenders
+
+        self._buckets = [0] * (len(LAG_BUCKETS_MS) + 1)
+        self._samples = 0
+        self._lag_sum = 0.0
+        self._lag_max = 0.0
+        self._offenders: dict[tuple, dict] = {}
+        self._lock = threading.Lock()
+
+        self._loop_thread_id: int | None = None
+        self._last_beat = time.monotonic()
+        self._task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    @classmethod
+    def from_env(cls) -> "LoopMonitor":
+        return cls(
+            interval=float(os.getenv("LOOP_MONITOR_INTERVAL_MS", 50)) / 1000,
+            threshold=float(os.getenv("LOOP_MONITOR_THRESHOLD_MS", 100)) / 1000,
+        )
+
+    def start(self) -> None:
+        """Start monitoring the running loop; call from inside it."""
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _heartbeat(self) -> None:
+        while True:
+            before = time.monotonic()
+            self._last_beat = before
+            await asyncio.sleep(self.interval)
+            self._record_lag(max(0.0, time.monotonic() - before - self.interval))
+
+    def _record_lag(self, lag: float) -> None:
+        ms = lag * 1000
+        with self._lock:
+            self._buckets[bisect.bisect_left(LAG_BUCKETS_MS, ms)] += 1
+            self._samples += 1
+            self._lag_sum += lag
+            self._lag_max = max(self._lag_max, lag)
+
+    def _watch(self) -> None:
+        stall_started = None
+        stall_key = None
+        while not self._stopped.wait(self.threshold / 2):
+            last_beat = self._last_beat
+            blocked_for = time.monotonic() - last_beat - self.interval
+            if blocked_for < self.threshold:
+                stall_started = stall_key = None
+                continue
+
+            if stall_started != last_beat:
+                # a new stall: the loop thread's current frame is the offender
+                stall_started = last_beat
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is None:
+                    continue
+                stall_key = tuple(traceback.format_list(traceback.extract_stack(frame)[-STACK_DEPTH:]))
+                self._record_offender(stall_key, blocked_for, new_stall=True)
+            elif stall_key is not None:
+                self._record_offender(stall_key, blocked_for, new_stall=False)
+
+    def _record_offender(self, key: tuple, blocked_for: float, new_stall: bool) -> None:
+        with self._lock:
+            entry = self._offenders.get(key)
+            if entry is None:
+                if len(self._offenders) >= self.max_offenders:
+                    # evict the least significant offender to stay bounded
+                    weakest = min(self._offenders, key=lambda k: self._offenders[k]["max_blocked_ms"])
+                    del self._offenders[weakest]
+                entry = self._offenders[key] = {"count": 0, "max_blocked_ms": 0.0, "stack": "".join(key)}
+            if new_stall:
+                entry["count"] += 1
+            entry["max_blocked_ms"] = max(entry["max_blocked_ms"], round(blocked_for * 1000, 1))
+
+    def snapshot(self, top: int = 10) -> dict:
+        with self._lock:
+            bounds = [f"<={b}ms" for b in LAG_BUCKETS_MS] + [f">{LAG_BUCKETS_MS[-1]}ms"]
+            offenders = sorted(
+                self._offenders.values(), key=lambda e: (e["max_blocked_ms"], e["count"]), reverse=True,
+            )
+            return {
+                "interval_ms": self.interval * 1000,
+                "threshold_ms": self.threshold * 1000,
+                "samples": self._samples,
+                "lag_mean_ms": round(self._lag_sum / self._samples * 1000, 3) if self._samples else 0.0,
+                "lag_max_ms": round(self._lag_max * 1000, 3),
+                "histogram": dict(zip(bounds, self._buckets)),
+                "top_offenders": [dict(e) for e in offenders[:top]],
+            }
+
+
+_monitor: LoopMonitor | None = None
+
+
+def get_monitor() -> LoopMonitor | None:
+    """The running monitor, or ``None`` when diagnostics are off."""
+    return _monitor
+
+
+async def start_monitor() -> LoopMonitor | None:
+    """Start the monitor if ``LOOP_MONITOR`` is enabled in the environment."""
+    global _monitor
+    load_env()
+    if os.getenv("LOOP_MONITOR", "").lower() not in ("1", "true", "yes", "on"):
+        return None
+    if _monitor is None:
+        _monitor = LoopMonitor.from_env()
+        _monitor.start()
+    return _monitor
+
+
+async def stop_monitor() -> None:
+    global _monitor
+    if _monitor is not None:
+        await _monitor.stop()
+    _monitor = None
@@ -1,117 +1,329 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends, Query
-from fastapi.concurrency import run_in_threadpool
+from fastapi import APIRouter, FastAPI, UploadFile, File, Form, Header, HTTPException, Depends, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import delete, select, func, update
 from uuid import uuid4
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
 from typing import List
-import tempfile
+import asyncio
+import hashlib
 import subprocess
 import os
-import aiohttp
+import time
 
-from . import storage_r2
-from .db import get_db
+from . import idempotency, mp4meta, storage_r2
+from .db import get_db, dispose_engine
 from .deps import get_current_user
 from .models import Video, VideoSegment, User
-from .schemas import VideoOut, VideoUpdate, SplitRequest, SplitResult
+from .schemas import PYDANTIC_V2, BatchIds, BatchResult, BatchUpdate, VideoOut, VideoListOut, VideoUpdate, SplitRequest, SplitResult, SceneDetectionResult
 from .auth import router as auth_router
+from .config import load_env
+from .admin import router as admin_router
+from .loop_monitor import start_monitor, stop_monitor
+from .media_scheduler import get_scheduler, shutdown_scheduler
+from .scratch import get_scratch, sweep_scratch
+from .zipstream import stream_zip
+
+# Nothing in this module touches the network, the filesystem or credentials
+# at import time: the DB engine, R2 client and media scheduler are built on
+# first use, and heavy optional imports (aiohttp, numpy via .scenes) happen
+# inside the handlers that need them. That keeps cold starts on scale-to-zero
+# machines short.
+
+router = APIRouter()
+
+SPLIT_SEGMENT_OVERHEAD = 1024 * 1024  # container + keyframe slack per cut
+ARCHIVE_CHUNK_SIZE = 1024 * 1024      # read size for segments streamed into an archive
+
+# Lifetime of the signed R2 URLs embedded in video payloads. ETags include
+# the current half-TTL window (see _url_epoch), so a cached copy stops
+# revalidating before the URLs in it expire.
+SIGNED_URL_TTL = 3600
+CACHE_CONTROL = "private, no-cache"
+
+
+def _archive_prefetch() -> int:
+    """Segments downloaded ahead of the one being written to an archive."""
+    load_env()
+    return int(os.getenv("ARCHIVE_PREFETCH", 4))
+
+
+def _touch(video: Video) -> None:
+    """Mark a video (or its segments) as changed so cached ETags go stale."""
+    video.version = (video.version or 0) + 1
+    video.updated_at = datetime.utcnow()
+
+
+def _url_epoch() -> int:
+    """Index of the current half-TTL window; rolls every ``SIGNED_URL_TTL // 2`` seconds."""
+    return int(time.time() // (SIGNED_URL_TTL // 2))
+
+
+def _make_etag(*parts) -> str:
+    raw = ":".join(str(p) for p in parts)
+    return '"%s"' % hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    tags = [t.strip().removeprefix("W/") for t in header.split(",")]
+    return etag in tags
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
 
-app = FastAPI()
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+def _dump(model, obj) -> dict:
+    """JSON-ready ``response_model`` output, as stored for idempotent replays."""
+    return jsonable_encoder(model.model_validate(obj) if PYDANTIC_V2 else model.from_orm(obj))
 
-MEDIA_DIR = Path(__file__).parent / "videos"
-MEDIA_DIR.mkdir(exist_ok=True)
 
-app.include_router(auth_router)
+async def _idempotent(db: AsyncSession, key: str, user_id: str, scope: str, request_hash: str, handler):
+    """Run ``handler(claim)`` at most once per key; replay its response on retries."""
+    outcome = await idempotency.claim(db, key, user_id, scope, request_hash)
+    if isinstance(outcome, Response):
+        return outcome
+    try:
+        async with outcome.held(db.bind):
+            return await handler(outcome)
+    except BaseException:
+        # failed, cancelled or taken over: free the key (if still ours) so the
+        # client's retry does the work
+        await outcome.abandon(db)
+        raise
 
 
-@app.post("/videos", response_model=VideoOut)
+@router.post("/videos", response_model=VideoOut)
 async def create_video(
     title: str = Form(...),
     description: str | None = Form(None),
     file: UploadFile = File(...),
+    idempotency_key: str | None = Header(None),
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    filename = f"{uuid4().hex}_{os.path.basename(file.filename)}"
-
     # Read file contents once
     contents = await file.read()
 
-    # Upload to R2
-    await storage_r2.upload_file_to_r2(contents, filename)
+    async def handler(claim=None):
+        return await _create_video(db, user.id, title, description, file.filename, contents, claim)
 
-    # Save locally only to get duration via ffprobe
-    MEDIA_DIR.mkdir(exist_ok=True)
-    temp_path = MEDIA_DIR / filename
-    with open(temp_path, "wb") as f:
-        f.write(contents)
+    if idempotency_key is None:
+        return await handler()
+    request_hash = idempotency.fingerprint(title, description, file.filename, contents)
+    return await _idempotent(db, idempotency_key, user.id, "POST /videos", request_hash, handler)
 
-    del contents  # free memory immediately after writing
 
-    cmd = [
-        "ffprobe",
-        "-v", "error",
-        "-show_entries", "format=duration",
-        "-of", "default=nokey=1:noprint_wrappers=1",
-        str(temp_path),
-    ]
+async def _create_video(
+    db: AsyncSession,
+    user_id: str,
+    title: str,
+    description: str | None,
+    upload_name: str,
+    contents: bytes,
+    claim: idempotency.Claim | None = None,
+) -> Video:
+    filename = f"{uuid4().hex}_{os.path.basename(upload_name)}"
 
-    result = await run_in_threadpool(
-        subprocess.run,
-        cmd,
-        check=True,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-    )
+    # Probe before uploading so a rejected or unreadable file never reaches R2.
+    # MP4/MOV metadata comes straight from the moov box; ffprobe handles the rest.
+    try:
+        duration = mp4meta.probe_bytes(contents).duration
+    except mp4meta.NotMP4:
+        duration = await _ffprobe_duration(user_id, filename, contents)
 
-    temp_path.unlink(missing_ok=True)
+    # Upload to R2
+    await storage_r2.upload_file_to_r2(contents, filename)
+    del contents  # free memory as soon as the upload is done
 
     video = Video(
         id=uuid4().hex,
-        user_id=user.id,
+        user_id=user_id,
         file_id=filename,
         title=title,
         description=description,
         video_url=filename,
-        duration=float(result.stdout.strip()),
+        duration=duration,
         status="Draft",
         created_at=datetime.utcnow(),
+        version=1,
+        updated_at=datetime.utcnow(),
     )
 
     db.add(video)
-    await db.commit()
+    await db.flush()
     await db.refresh(video)
+    if claim is not None:
+        # same transaction as the video row: a crash cannot leave one without the other
+        await claim.complete(db, 200, _dump(VideoOut, video))
+    await db.commit()
     return video
 
 
-@app.get("/videos/{id}", response_model=VideoOut)
-async def get_video(id: str, db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user)):
+async def _ffprobe_duration(user_id: str, filename: str, contents: bytes) -> float:
+    async with get_scratch().reserve(len(contents)) as scratch_dir:
+        async with get_scheduler().slot(user_id):
+            # Save to scratch only to get duration via ffprobe
+            temp_path = scratch_dir / filename
+            with open(temp_path, "wb") as f:
+                f.write(contents)
+
+            cmd = [
+                "ffprobe",
+                "-v", "error",
+                "-show_entries", "format=duration",
+                "-of", "default=nokey=1:noprint_wrappers=1",
+                str(temp_path),
+            ]
+
+            result = await get_scheduler().run(
+                subprocess.run,
+                cmd,
+                check=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+            )
+    return float(result.stdout.strip())
+
+
+def _batch_ids(ids: List[str]) -> List[str]:
+    """De-duplicated ids in request order; the schemas already cap the count."""
+    return list(dict.fromkeys(ids))
+
+
+async def _owned_ids(db: AsyncSession, ids: List[str], user_id: str) -> set:
+    """The subset of ``ids`` that belongs to ``user_id``, in one IN query."""
+    res = await db.execute(select(Video.id).where(Video.id.in_(ids), Video.user_id == user_id))
+    return set(res.scalars().all())
+
+
+# Registered before the /videos/{id} routes so "batch" is never taken for an id.
+@router.post("/videos/batch/get", response_model=BatchResult)
+async def batch_get_videos(
+    payload: BatchIds,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    ids = _batch_ids(payload.ids)
+    res = await db.execute(select(Video).where(Video.id.in_(ids), Video.user_id == user.id))
+    videos = {video.id: video for video in res.scalars().all()}
+
+    # serialize first so signing never writes URLs back onto the ORM rows
+    found = [_dump(VideoOut, videos[id]) for id in ids if id in videos]
+    keys = [item["video_url"] for item in found] + [
+        seg["segment_url"] for item in found for seg in item["segments"]
+    ]
+    urls = dict(zip(keys, await asyncio.gather(
+        *(storage_r2.get_signed_url(key, SIGNED_URL_TTL) for key in keys)
+    )))
+    for item in found:
+        item["video_url"] = urls[item["video_url"]]
+        for seg in item["segments"]:
+            seg["segment_url"] = urls[seg["segment_url"]]
+
+    by_id = {item["id"]: item for item in found}
+    return {
+        "results": [
+            {"id": id, "status": 200, "video": by_id[id]} if id in by_id else {"id": id, "status": 404}
+            for id in ids
+        ]
+    }
+
+
+@router.post("/videos/batch/update", response_model=BatchResult)
+async def batch_update_videos(
+    payload: BatchUpdate,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    ids = _batch_ids(payload.ids)
+    changes = payload.changes.dict(exclude_unset=True)
+    if not changes:
+        raise HTTPException(status_code=422, detail="No changes given")
+    nulls = sorted(k for k, v in changes.items() if v is None and not Video.__table__.c[k].nullable)
+    if nulls:
+        raise HTTPException(status_code=422, detail=f"{', '.join(nulls)} cannot be null")
+
+    owned = await _owned_ids(db, ids, user.id)
+    if owned:
+        await db.execute(
+            update(Video)
+            .where(Video.id.in_(sorted(owned)))
+            .values(**changes, version=Video.version + 1, updated_at=datetime.utcnow())
+        )
+    await db.commit()
+
+    return {"results": [{"id": id, "status": 200 if id in owned else 404} for id in ids]}
+
+
+@router.post("/videos/batch/delete", response_model=BatchResult)
+async def batch_delete_videos(
+    payload: BatchIds,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    ids = _batch_ids(payload.ids)
+    owned = await _owned_ids(db, ids, user.id)
+    if owned:
+        await _delete_videos(db, sorted(owned))
+    await db.commit()
+
+    return {"results": [{"id": id, "status": 204 if id in owned else 404} for id in ids]}
+
+
+async def _delete_videos(db: AsyncSession, ids) -> None:
+    """Delete videos and their segments with two set-based statements."""
+    await db.execute(delete(VideoSegment).where(VideoSegment.video_id.in_(ids)))
+    await db.execute(delete(Video).where(Video.id.in_(ids)))
+
+
+@router.get("/videos/{id}", response_model=VideoOut)
+async def get_video(
+    id: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    # Cheap single-column check first: no segment loading or URL signing on a hit
+    version = (
+        await db.execute(select(Video.version).where(Video.id == id, Video.user_id == user.id))
+    ).scalar_one_or_none()
+    if version is None:
+        raise HTTPException(status_code=404)
+
+    epoch = _url_epoch()
+    etag = _make_etag(id, version, epoch)
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
+
     res = await db.execute(select(Video).where(Video.id == id, Video.user_id == user.id))
     video = res.scalars().first()
     if not video:
         raise HTTPException(status_code=404)
 
-    video.video_url = await storage_r2.get_signed_url(video.file_id)
+    video.video_url = await storage_r2.get_signed_url(video.file_id, SIGNED_URL_TTL)
 
     for seg in video.segments:
-        seg.segment_url = await storage_r2.get_signed_url(seg.segment_url)
+        seg.segment_url = await storage_r2.get_signed_url(seg.segment_url, SIGNED_URL_TTL)
 
+    response.headers["ETag"] = _make_etag(id, video.version, epoch)
+    response.headers["Cache-Control"] = CACHE_CONTROL
     return video
 
 
-@app.patch("/videos/{id}", response_model=VideoOut)
+@router.patch("/videos/{id}", response_model=VideoOut)
 async def update_video(id: str, payload: VideoUpdate, db: AsyncSession = Depends(get_db)):
     res = await db.execute(select(Video).where(Video.id == id))
     video = res.scalars().first()
@@ -120,62 +332,92 @@ async def update_video(id: str, payload: VideoUpdate, db: AsyncSession = Depends
 
     for k, v in payload.dict(exclude_unset=True).items():
         setattr(video, k, v)
+    _touch(video)
 
     await db.commit()
     await db.refresh(video)
     return video
 
 
-@app.post("/videos/{id}/split", response_model=SplitResult)
-async def split_video(id: str, payload: SplitRequest, db: AsyncSession = Depends(get_db)):
+@router.post("/videos/{id}/split", response_model=SplitResult)
+async def split_video(
+    id: str,
+    payload: SplitRequest,
+    idempotency_key: str | None = Header(None),
+    db: AsyncSession = Depends(get_db),
+):
+    async def handler(claim=None):
+        return await _split_video(db, id, payload, claim)
+
+    if idempotency_key is None:
+        return await handler()
+
+    owner_id = (await db.execute(select(Video.user_id).where(Video.id == id))).scalar_one_or_none()
+    if owner_id is None:
+        raise HTTPException(status_code=404, detail="Video not found")
+    request_hash = idempotency.fingerprint(payload.dict())
+    return await _idempotent(db, idempotency_key, owner_id, f"POST /videos/{id}/split", request_hash, handler)
+
+
+async def _split_video(
+    db: AsyncSession, id: str, payload: SplitRequest, claim: idempotency.Claim | None = None
+) -> dict:
     res = await db.execute(select(Video).where(Video.id == id))
     video = res.scalars().first()
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
 
+    previous_status = video.status
     video.status = "Processing"
+    _touch(video)
     await db.commit()
 
     segment_urls: List[str] = []
     new_segments: List[VideoSegment] = []
 
-    source_url = await storage_r2.get_signed_url(video.file_id)
-
-    # Stream download from R2 directly to disk — avoids loading entire video into RAM
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as tmp_file:
-        tmp_path = Path(tmp_file.name)
-        async with aiohttp.ClientSession() as session:
-            async with session.get(source_url) as resp:
-                if resp.status != 200:
-                    raise HTTPException(status_code=502, detail="Could not fetch video from R2")
-                async for chunk in resp.content.iter_chunked(1024 * 1024):  # 1MB chunks
-                    tmp_file.write(chunk)
-
     try:
-        with tempfile.TemporaryDirectory() as tmpdir:
-            for seg in payload.segments:
-                out_name = f"{uuid4().hex}.mp4"
-                out_tmp = Path(tmpdir) / out_name
-
-                cmd = [
-                    "ffmpeg",
-                    "-y",
-                    "-ss", str(seg.start),
-                    "-i", str(tmp_path),
-                    "-t", str(seg.end - seg.start),
-                    "-c", "copy",             # no re-encoding at all, just cuts the stream
-                    "-movflags", "faststart",
-                    str(out_tmp),
-                ]
-
-                await run_in_threadpool(
-                    subprocess.run,
-                    cmd,
-                    check=True,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                )
+        source_url = await storage_r2.get_signed_url(video.file_id)
+        source_size = await storage_r2.get_object_size(video.file_id)
+        if not video.duration:
+            # older rows have no duration; a ranged read of the moov is enough to size the job
+            try:
+                video.duration = (await mp4meta.probe_r2(video.file_id)).duration
+            except mp4meta.NotMP4:
+                pass
+
+        async with get_scratch().reserve(_split_footprint(video, payload, source_size)) as scratch_dir:
+            tmp_path = scratch_dir / "source.mp4"
+            await _download_source(source_url, tmp_path)
+
+            cuts = []
+
+            # Hold a media slot only while ffmpeg runs; R2 transfers stay outside it
+            async with get_scheduler().slot(video.user_id):
+                for seg in payload.segments:
+                    out_name = f"{uuid4().hex}.mp4"
+                    out_tmp = scratch_dir / out_name
+
+                    cmd = [
+                        "ffmpeg",
+                        "-y",
+                        "-ss", str(seg.start),
+                        "-i", str(tmp_path),
+                        "-t", str(seg.end - seg.start),
+                        "-c", "copy",             # no re-encoding at all, just cuts the stream
+                        "-movflags", "faststart",
+                        str(out_tmp),
+                    ]
+
+                    await get_scheduler().run(
+                        subprocess.run,
+                        cmd,
+                        check=True,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.PIPE,
+                    )
+                    cuts.append((seg, out_name, out_tmp))
 
+            for seg, out_name, out_tmp in cuts:
                 # Stream upload from disk — avoids loading segment into RAM
                 await storage_r2.upload_file_path_to_r2(out_tmp, out_name)
 
@@ -189,19 +431,107 @@ async def split_video(id: str, payload: SplitRequest, db: AsyncSession = Depends
                         segment_url=out_name,
                     )
                 )
-    finally:
-        tmp_path.unlink(missing_ok=True)
+    except Exception:
+        # don't leave the video stuck in "Processing" (e.g. after a 429/503)
+        video.status = previous_status
+        _touch(video)
+        await db.commit()
+        raise
 
-    for s in new_segments:
-        db.add(s)
+    # go through the relationship so an already-loaded video.segments sees them
+    video.segments.extend(new_segments)
 
     video.status = "Ready"
+    _touch(video)
+    result = {"segment_urls": segment_urls}
+    if claim is not None:
+        await claim.complete(db, 200, result)
+    await db.commit()
+
+    return result
+
+
+def _split_footprint(video: Video, payload: SplitRequest, source_size: int) -> int:
+    """Worst-case scratch bytes for a split: the source plus its stream-copied cuts."""
+    cut_seconds = sum(seg.end - seg.start for seg in payload.segments)
+    if video.duration:
+        ratio = cut_seconds / video.duration
+    else:
+        ratio = len(payload.segments)
+    # stream copy keeps the bitrate; cuts start on a keyframe, so allow some slack
+    outputs = int(source_size * ratio * 1.1) + SPLIT_SEGMENT_OVERHEAD * len(payload.segments)
+    return source_size + outputs
+
+
+async def _download_source(url: str, dest: Path) -> None:
+    """Stream an R2 object to disk — avoids loading the entire video into RAM."""
+    import aiohttp
+
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url) as resp:
+            if resp.status != 200:
+                raise HTTPException(status_code=502, detail="Could not fetch video from R2")
+            with open(dest, "wb") as f:
+                async for chunk in resp.content.iter_chunked(1024 * 1024):  # 1MB chunks
+                    f.write(chunk)
+
+
+@router.post("/videos/{id}/scenes", response_model=SceneDetectionResult)
+async def detect_video_scenes(
+    id: str,
+    threshold: float | None = Query(None, gt=0, le=1),
+    min_scene: float | None = Query(None, ge=0),
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    from . import scenes
+
+    res = await db.execute(select(Video).where(Video.id == id, Video.user_id == user.id))
+    video = res.scalars().first()
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
+
+    # ffmpeg reads the signed URL itself: one decode pass, no local copy
+    source_url = await storage_r2.get_signed_url(video.file_id)
+    async with get_scheduler().slot(video.user_id):
+        try:
+            cuts, scanned = await get_scheduler().run(
+                scenes.detect_scenes,
+                source_url,
+                threshold=scenes.DEFAULT_THRESHOLD if threshold is None else threshold,
+                min_scene=scenes.DEFAULT_MIN_SCENE if min_scene is None else min_scene,
+            )
+        except subprocess.TimeoutExpired:
+            raise HTTPException(status_code=504, detail="Scene detection timed out")
+
+    video.scene_cuts = cuts
+    _touch(video)
     await db.commit()
 
-    return {"segment_urls": segment_urls}
+    return {"cuts": cuts, "segments": scenes.cuts_to_segments(cuts, video.duration or scanned)}
+
+
+@router.get("/videos/{id}/scenes", response_model=SceneDetectionResult)
+async def get_video_scenes(
+    id: str,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    from . import scenes
+
+    res = await db.execute(select(Video).where(Video.id == id, Video.user_id == user.id))
+    video = res.scalars().first()
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
+    if video.scene_cuts is None:
+        raise HTTPException(status_code=404, detail="Scene detection has not been run")
 
+    cuts = video.scene_cuts
+    end = video.duration if video.duration is not None else (cuts[-1] if cuts else 0.0)
+    return {"cuts": cuts, "segments": scenes.cuts_to_segments(cuts, end)}
 
-@app.get("/media/segments/{id}")
+
+@router.get("/media/segments/{id}")
 async def download_segment(id: str, db: AsyncSession = Depends(get_db)):
     res = await db.execute(select(VideoSegment).where(VideoSegment.id == id))
     segment = res.scalars().first()
@@ -212,8 +542,58 @@ async def download_segment(id: str, db: AsyncSession = Depends(get_db)):
     return {"url": signed_url}
 
 
-@app.get("/videos")
+@router.get("/videos/{id}/segments/archive")
+async def download_segments_archive(
+    id: str,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    res = await db.execute(select(Video).where(Video.id == id, Video.user_id == user.id))
+    video = res.scalars().first()
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
+
+    segments = sorted(video.segments, key=lambda s: (s.start, s.end))
+    if not segments:
+        raise HTTPException(status_code=404, detail="Video has no segments")
+
+    keys = [seg.segment_url for seg in segments]
+    names = [
+        f"{i:03d}_{seg.start:g}-{seg.end:g}{Path(seg.segment_url).suffix or '.mp4'}"
+        for i, seg in enumerate(segments, start=1)
+    ]
+
+    async def body():
+        import aiohttp
+
+        async with aiohttp.ClientSession() as session:
+            entries = [(name, _segment_source(session, key)) for name, key in zip(names, keys)]
+            async for chunk in stream_zip(entries, prefetch=_archive_prefetch()):
+                yield chunk
+
+    return StreamingResponse(
+        body(),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{video.id}-segments.zip"'},
+    )
+
+
+def _segment_source(session, key: str):
+    async def chunks():
+        url = await storage_r2.get_signed_url(key)
+        async with session.get(url) as resp:
+            if resp.status != 200:
+                raise RuntimeError(f"Could not fetch segment {key} from R2 ({resp.status})")
+            async for chunk in resp.content.iter_chunked(ARCHIVE_CHUNK_SIZE):
+                yield chunk
+
+    return chunks
+
+
+@router.get("/videos", response_model=VideoListOut)
 async def list_videos(
+    request: Request,
+    response: Response,
     page: int = Query(1, ge=1),
     size: int = Query(10, ge=1, le=100),
     search: str | None = None,
@@ -227,17 +607,30 @@ async def list_videos(
     if status:
         stmt = stmt.where(Video.status == status)
 
-    total = (await db.execute(select(func.count()).select_from(stmt.subquery()))).scalar_one()
+    # One aggregate row covers the whole filtered set: any insert, delete or
+    # version bump changes count, sum(version) or max(updated_at).
+    matched = stmt.subquery()
+    total, version_sum, last_updated = (
+        await db.execute(
+            select(func.count(), func.coalesce(func.sum(matched.c.version), 0), func.max(matched.c.updated_at))
+        )
+    ).one()
+    etag = _make_etag(user.id, page, size, search, status, total, version_sum, last_updated, _url_epoch())
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
+
     pages = (total + size - 1) // size
 
     res = await db.execute(stmt.order_by(Video.created_at.desc()).offset((page - 1) * size).limit(size))
     videos = res.scalars().all()
 
     for video in videos:
-        video.video_url = await storage_r2.get_signed_url(video.file_id)
+        video.video_url = await storage_r2.get_signed_url(video.file_id, SIGNED_URL_TTL)
         for seg in video.segments:
-            seg.segment_url = await storage_r2.get_signed_url(seg.segment_url)
+            seg.segment_url = await storage_r2.get_signed_url(seg.segment_url, SIGNED_URL_TTL)
 
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
     return {
         "items": videos,
         "total": total,
@@ -247,28 +640,53 @@ async def list_videos(
     }
 
 
-@app.delete("/videos/{id}", status_code=204)
+@router.delete("/videos/{id}", status_code=204)
 async def delete_video(
     id: str,
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    res = await db.execute(
-        select(Video).where(Video.id == id, Video.user_id == user.id)
-    )
-    video = res.scalars().first()
-    if not video:
+    if not await _owned_ids(db, [id], user.id):
         raise HTTPException(status_code=404, detail="Video not found")
 
-    seg_res = await db.execute(
-        select(VideoSegment).where(VideoSegment.video_id == video.id)
+    await _delete_videos(db, [id])
+    await db.commit()
+
+    return
+
+
+@router.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await start_monitor()
+    # clear temp files a crashed worker left behind before taking new jobs
+    await run_in_threadpool(sweep_scratch)
+    yield
+    await stop_monitor()
+    shutdown_scheduler()
+    await dispose_engine()
+
+
+def create_app() -> FastAPI:
+    """Build the ASGI app. Cheap: no I/O happens until the first request."""
+    app = FastAPI(lifespan=lifespan)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
     )
-    segments = seg_res.scalars().all()
 
-    for seg in segments:
-        await db.delete(seg)
+    app.include_router(auth_router)
+    app.include_router(router)
+    app.include_router(admin_router)
+    return app
 
-    await db.delete(video)
-    await db.commit()
 
-    return
\ No newline at end of file
+app = create_app()
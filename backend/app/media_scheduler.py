@@ -0,0 +1,216 @@
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+
+from fastapi import HTTPException
+
+from .config import load_env
+
+
+class MediaBusy(HTTPException):
+    """Raised when the media wait queue is full; rendered as 429 + Retry-After."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(
+            status_code=429,
+            detail="Media processing is busy, retry later",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class MediaScheduler:
+    """Admission control for ffprobe/ffmpeg work.
+
+    At most ``max_concurrency`` jobs run at once and at most ``max_per_user``
+    of them belong to the same user. Jobs that cannot start immediately wait
+    in a bounded queue, of which one user may hold at most
+    ``max_queue_per_user`` entries; freed slots are handed out round-robin
+    across users so one user's batch cannot starve everyone else. Blocking calls made through
+    :meth:`run` execute on a dedicated executor instead of the shared
+    threadpool used by ``run_in_threadpool``.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue: int,
+        max_per_user: int,
+        max_queue_per_user: int | None = None,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.max_per_user = max(1, min(max_per_user, self.max_concurrency))
+        if max_queue_per_user is None:
+            max_queue_per_user = max(1, self.max_queue // 2)
+        self.max_queue_per_user = max(0, min(max_queue_per_user, self.max_queue))
+
+        self._running = 0
+        self._active: dict[str, int] = {}
+        self._waiters: dict[str, deque] = {}
+        self._rotation: deque = deque()
+        self._executor: ThreadPoolExecutor | None = None
+        self._avg_job_seconds = 10.0
+        self._rejected = 0
+
+    @classmethod
+    def from_env(cls) -> "MediaScheduler":
+        concurrency = int(os.getenv("MEDIA_MAX_CONCURRENCY", os.cpu_count() or 2))
+        return cls(
+            max_concurrency=concurrency,
+            max_queue=int(os.getenv("MEDIA_MAX_QUEUE", 16)),
+            max_per_user=int(os.getenv("MEDIA_MAX_PER_USER", max(1, concurrency // 2))),
+            max_queue_per_user=(
+                int(os.environ["MEDIA_MAX_QUEUE_PER_USER"])
+                if "MEDIA_MAX_QUEUE_PER_USER" in os.environ
+                else None
+            ),
+        )
+
+    @property
+    def waiting(self) -> int:
+        return sum(len(q) for q in self._waiters.values())
+
+    def _eligible(self, user_id: str) -> bool:
+        return self._active.get(user_id, 0) < self.max_per_user
+
+    def _grant(self, user_id: str) -> None:
+        self._running += 1
+        self._active[user_id] = self._active.get(user_id, 0) + 1
+
+    def _dispatch(self) -> None:
+        while self._running < self.max_concurrency and self._rotation:
+            for _ in range(len(self._rotation)):
+                user_id = self._rotation[0]
+                self._rotation.rotate(-1)
+                if not self._eligible(user_id):
+                    continue
+                queue = self._waiters[user_id]
+                while queue and queue[0].done():
+                    queue.popleft()
+                if not queue:
+                    del self._waiters[user_id]
+                    self._rotation.remove(user_id)
+                    break
+                self._grant(user_id)
+                queue.popleft().set_result(None)
+                if not queue:
+                    del self._waiters[user_id]
+                    self._rotation.remove(user_id)
+                break
+            else:
+                # every waiting user is already at their fair share
+                return
+
+    def _retry_after(self) -> int:
+        backlog = self.waiting + self._running
+        return max(1, math.ceil(self._avg_job_seconds * backlog / self.max_concurrency))
+
+    async def _acquire(self, user_id: str) -> None:
+        # Anyone still waiting while a slot is free is already at their fair
+        # share (otherwise _dispatch would have started them), so an eligible
+        # caller never has to queue behind them.
+        if self._running < self.max_concurrency and self._eligible(user_id):
+            self._grant(user_id)
+            return
+
+        queued = len(self._waiters.get(user_id, ()))
+        if self.waiting >= self.max_queue or queued >= self.max_queue_per_user:
+            self._rejected += 1
+            raise MediaBusy(self._retry_after())
+
+        fut = asyncio.get_running_loop().create_future()
+        if user_id not in self._waiters:
+            self._waiters[user_id] = deque()
+            self._rotation.append(user_id)
+        self._waiters[user_id].append(fut)
+        self._dispatch()
+
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # slot was granted just as we were cancelled; hand it back
+                self._release(user_id)
+            else:
+                self._discard(user_id, fut)
+            raise
+
+    def _discard(self, user_id: str, fut) -> None:
+        queue = self._waiters.get(user_id)
+        if queue is None:
+            return
+        try:
+            queue.remove(fut)
+        except ValueError:
+            pass
+        if not queue:
+            del self._waiters[user_id]
+            self._rotation.remove(user_id)
+
+    def _release(self, user_id: str) -> None:
+        self._running -= 1
+        self._active[user_id] -= 1
+        if not self._active[user_id]:
+            del self._active[user_id]
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, user_id: str):
+        """Hold one media slot for ``user_id`` for the duration of the block."""
+        await self._acquire(user_id)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            self._avg_job_seconds = 0.8 * self._avg_job_seconds + 0.2 * elapsed
+            self._release(user_id)
+
+    async def run(self, func, *args, **kwargs):
+        """Run a blocking call (e.g. ``subprocess.run``) on the media executor."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency, thread_name_prefix="media"
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    def stats(self) -> dict:
+        return {
+            "running": self._running,
+            "waiting": self.waiting,
+            "rejected": self._rejected,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "max_per_user": self.max_per_user,
+            "max_queue_per_user": self.max_queue_per_user,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+_scheduler: MediaScheduler | None = None
+
+
+def get_scheduler() -> MediaScheduler:
+    """Process-wide scheduler, configured from the environment on first use."""
+    global _scheduler
+    if _scheduler is None:
+        load_env()
+        _scheduler = MediaScheduler.from_env()
+    return _scheduler
+
+
+def shutdown_scheduler() -> None:
+    global _scheduler
+    if _scheduler is not None:
+        _scheduler.shutdown()
+    _scheduler = None
@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, String, Float, Integer, DateTime, ForeignKey, JSON, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .db import Base
@@ -33,6 +33,11 @@ class Video(Base):
     duration = Column(Float, nullable=True)
     status = Column(String, nullable=False, default="Draft")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # bumped on every change to the video or its segments; drives ETags
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+    # candidate split points (seconds) proposed by scene detection
+    scene_cuts = Column(JSON, nullable=True)
 
     user = relationship("User", back_populates="videos")
 
@@ -55,3 +60,21 @@ class VideoSegment(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     video = relationship("Video", back_populates="segments")
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (UniqueConstraint("user_id", "scope", "key", name="uq_idempotency_keys_user_scope_key"),)
+
+    id = Column(String, primary_key=True)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    scope = Column(String, nullable=False)          # e.g. "POST /videos"
+    key = Column(String, nullable=False)
+    request_hash = Column(String, nullable=False)
+    status = Column(String, nullable=False)         # in_progress | completed
+    owner = Column(String, nullable=False)          # attempt currently holding the key
+    locked_until = Column(DateTime(timezone=True), nullable=False)
+    response_status = Column(Integer, nullable=True)
+    response_body = Column(JSON, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    completed_at = Column(DateTime(timezone=True), nullable=True)
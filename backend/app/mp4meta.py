@@ -0,0 +1,241 @@
+"""Read MP4/MOV metadata straight from the ``moov`` box.
+
+Everything ``create_video`` needs from ffprobe (duration, tracks, sample
+counts) lives in a few kilobytes of the ISO-BMFF ``moov`` box, so there is
+no need to write the upload to disk and spawn a process for it. The box walk
+is written without I/O: it yields ``(offset, length)`` read requests, so the
+same code serves in-memory uploads (:func:`probe_bytes`) and ranged reads of
+objects already in R2 (:func:`probe_r2`). Anything this parser does not
+understand raises :class:`NotMP4` and the caller falls back to ffprobe.
+"""
+import struct
+from typing import Awaitable, Callable, Generator, List, NamedTuple, Optional
+
+# The moov of a multi-hour recording is a few MB; anything bigger is not a
+# file we want to parse in-process.
+MAX_MOOV_BYTES = 64 * 1024 * 1024
+# First R2 read; covers ftyp + moov of a typical faststart upload in one go.
+R2_READ_AHEAD = 64 * 1024
+
+_TOP_LEVEL = {b"ftyp", b"moov", b"mdat", b"free", b"skip", b"wide", b"pnot", b"uuid", b"styp"}
+_HANDLERS = {"vide": "video", "soun": "audio", "text": "text", "sbtl": "subtitle", "subt": "subtitle"}
+
+
+class NotMP4(ValueError):
+    """Not an ISO-BMFF file, or one this parser does not handle (e.g. fragmented)."""
+
+
+class Track(NamedTuple):
+    track_id: int
+    kind: str                   # video, audio, ... or the raw handler type
+    codec: Optional[str]        # sample entry fourcc, e.g. avc1, hvc1, mp4a
+    timescale: int
+    duration: float             # seconds
+    width: Optional[float]
+    height: Optional[float]
+    sample_count: int
+    frame_rate: Optional[float]  # video tracks only
+
+
+class MovieInfo(NamedTuple):
+    duration: float             # seconds
+    tracks: List[Track]
+
+
+def _boxes(data: bytes, start: int, end: int):
+    """Yield ``(type, body_start, body_end)`` for the boxes in ``data[start:end]``."""
+    offset = start
+    while offset + 8 <= end:
+        size, kind = struct.unpack_from(">I4s", data, offset)
+        header = 8
+        if size == 1:
+            if offset + 16 > end:
+                raise NotMP4("truncated box header")
+            size = struct.unpack_from(">Q", data, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header or offset + size > end:
+            raise NotMP4(f"bad size for box {kind!r}")
+        yield kind, offset + header, offset + size
+        offset += size
+
+
+def _child(data: bytes, start: int, end: int, kind: bytes):
+    for k, s, e in _boxes(data, start, end):
+        if k == kind:
+            return s, e
+    return None
+
+
+def _full_box(data: bytes, start: int):
+    """Version and offset past the version/flags word of a full box."""
+    return data[start], start + 4
+
+
+def _times(data: bytes, start: int):
+    """``(timescale, duration)`` from an mvhd/mdhd body."""
+    version, pos = _full_box(data, start)
+    if version == 1:
+        return struct.unpack_from(">IQ", data, pos + 16)
+    return struct.unpack_from(">II", data, pos + 8)
+
+
+def _parse_trak(data: bytes, start: int, end: int) -> Track:
+    tkhd = _child(data, start, end, b"tkhd")
+    mdia = _child(data, start, end, b"mdia")
+    if tkhd is None or mdia is None:
+        raise NotMP4("track without tkhd/mdia")
+
+    version, pos = _full_box(data, tkhd[0])
+    if version == 1:
+        track_id = struct.unpack_from(">I", data, pos + 16)[0]
+        pos += 32
+    else:
+        track_id = struct.unpack_from(">I", data, pos + 8)[0]
+        pos += 20
+    # skip reserved(8), layer/alternate/volume/reserved(8), matrix(36)
+    width, height = (v / 65536 for v in struct.unpack_from(">II", data, pos + 52))
+
+    mdhd = _child(data, *mdia, b"mdhd")
+    hdlr = _child(data, *mdia, b"hdlr")
+    if mdhd is None or hdlr is None:
+        raise NotMP4("track without mdhd/hdlr")
+    timescale, duration = _times(data, mdhd[0])
+    handler = data[hdlr[0] + 8:hdlr[0] + 12].decode("latin-1")
+
+    codec = None
+    sample_count = 0
+    stts_ticks = 0
+    stbl = None
+    minf = _child(data, *mdia, b"minf")
+    if minf is not None:
+        stbl = _child(data, *minf, b"stbl")
+    if stbl is not None:
+        stsd = _child(data, *stbl, b"stsd")
+        if stsd is not None and stsd[1] - stsd[0] >= 16:
+            codec = data[stsd[0] + 12:stsd[0] + 16].decode("latin-1")
+        stts = _child(data, *stbl, b"stts")
+        if stts is not None:
+            entries = struct.unpack_from(">I", data, stts[0] + 4)[0]
+            if stts[0] + 8 + entries * 8 > stts[1]:
+                raise NotMP4("truncated stts")
+            pairs = struct.unpack_from(f">{entries * 2}I", data, stts[0] + 8)
+            sample_count = sum(pairs[0::2])
+            stts_ticks = sum(c * d for c, d in zip(pairs[0::2], pairs[1::2]))
+        stsz = _child(data, *stbl, b"stsz")
+        if stsz is not None:
+            sample_count = struct.unpack_from(">I", data, stsz[0] + 8)[0]
+
+    kind = _HANDLERS.get(handler, handler)
+    frame_rate = None
+    if kind == "video" and stts_ticks and timescale:
+        frame_rate = round(sample_count * timescale / stts_ticks, 3)
+
+    return Track(
+        track_id=track_id,
+        kind=kind,
+        codec=codec,
+        timescale=timescale,
+        duration=duration / timescale if timescale else 0.0,
+        width=width if kind == "video" else None,
+        height=height if kind == "video" else None,
+        sample_count=sample_count,
+        frame_rate=frame_rate,
+    )
+
+
+def parse_moov(moov: bytes) -> MovieInfo:
+    """Parse the body of a ``moov`` box (without its 8/16 byte header)."""
+    try:
+        if _child(moov, 0, len(moov), b"mvex") is not None:
+            # fragmented: samples and durations live in the moof boxes
+            raise NotMP4("fragmented MP4")
+        mvhd = _child(moov, 0, len(moov), b"mvhd")
+        if mvhd is None:
+            raise NotMP4("moov without mvhd")
+        timescale, duration = _times(moov, mvhd[0])
+        tracks = [_parse_trak(moov, s, e) for k, s, e in _boxes(moov, 0, len(moov)) if k == b"trak"]
+    except (struct.error, IndexError) as exc:
+        raise NotMP4(f"truncated moov: {exc}") from None
+
+    seconds = duration / timescale if timescale else 0.0
+    if seconds <= 0:
+        seconds = max((t.duration for t in tracks), default=0.0)
+    if seconds <= 0:
+        raise NotMP4("no duration in moov")
+    return MovieInfo(duration=seconds, tracks=tracks)
+
+
+ReadRequest = Generator[tuple, bytes, bytes]
+
+
+def _locate_moov(file_size: int) -> ReadRequest:
+    """Walk top-level box headers; yields reads, returns the moov body."""
+    offset = 0
+    while offset + 8 <= file_size:
+        header = yield offset, min(16, file_size - offset)
+        size, kind = struct.unpack_from(">I4s", header)
+        header_len = 8
+        if size == 1:
+            if len(header) < 16:
+                raise NotMP4("truncated box header")
+            size = struct.unpack_from(">Q", header, 8)[0]
+            header_len = 16
+        elif size == 0:
+            size = file_size - offset
+        if size < header_len or (offset == 0 and kind not in _TOP_LEVEL):
+            raise NotMP4("not an ISO-BMFF file")
+        if kind == b"moov":
+            if size > MAX_MOOV_BYTES or offset + size > file_size:
+                raise NotMP4("moov box too large or truncated")
+            return (yield offset + header_len, size - header_len)
+        offset += size
+    raise NotMP4("no moov box")
+
+
+def _checked(data: bytes, length: int) -> bytes:
+    if len(data) < length:
+        raise NotMP4("unexpected end of file")
+    return data
+
+
+def probe_bytes(data: bytes) -> MovieInfo:
+    """Metadata of an MP4/MOV held in memory."""
+    view = memoryview(data)
+    walk = _locate_moov(len(data))
+    try:
+        offset, length = next(walk)
+        while True:
+            offset, length = walk.send(_checked(bytes(view[offset:offset + length]), length))
+    except StopIteration as done:
+        return parse_moov(done.value)
+
+
+async def probe_range(read: Callable[[int, int], Awaitable[bytes]], file_size: int) -> MovieInfo:
+    """Metadata of an MP4/MOV reachable through ``await read(offset, length)``."""
+    walk = _locate_moov(file_size)
+    try:
+        offset, length = next(walk)
+        while True:
+            offset, length = walk.send(_checked(await read(offset, length), length))
+    except StopIteration as done:
+        return parse_moov(done.value)
+
+
+async def probe_r2(key: str) -> MovieInfo:
+    """Metadata of an object in R2 using a few ranged GETs instead of a download."""
+    from . import storage_r2
+
+    size = await storage_r2.get_object_size(key)
+    cache = {"offset": 0, "data": b""}
+
+    async def read(offset: int, length: int) -> bytes:
+        start = offset - cache["offset"]
+        if 0 <= start and start + length <= len(cache["data"]):
+            return cache["data"][start:start + length]
+        data = await storage_r2.read_range(key, offset, max(length, R2_READ_AHEAD))
+        cache["offset"], cache["data"] = offset, data
+        return data[:length]
+
+    return await probe_range(read, size)
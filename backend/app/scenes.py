@@ -0,0 +1,129 @@
+import subprocess
+import tempfile
+import threading
+from typing import List, Tuple
+
+import numpy as np
+
+# Scene changes survive heavy downscaling and decimation, so decode a tiny
+# grayscale stream and never touch full-resolution frames.
+SCAN_WIDTH = 64
+SCAN_HEIGHT = 36
+SCAN_FPS = 4.0
+BATCH_FRAMES = 512
+
+DEFAULT_THRESHOLD = 0.12   # mean absolute luma change, 0..1
+DEFAULT_MIN_SCENE = 1.0    # seconds
+DEFAULT_TIMEOUT = 1800.0   # seconds; ffmpeg is killed after this
+
+
+def scan_command(source: str, fps: float = SCAN_FPS) -> List[str]:
+    return [
+        "ffmpeg",
+        "-v", "error",
+        "-nostdin",
+        "-i", source,
+        "-an", "-sn",
+        "-vf", f"fps={fps},scale={SCAN_WIDTH}:{SCAN_HEIGHT}:flags=area,format=gray",
+        "-f", "rawvideo",
+        "-pix_fmt", "gray",
+        "pipe:1",
+    ]
+
+
+def frame_scores(frames: np.ndarray, previous: np.ndarray | None = None) -> np.ndarray:
+    """Mean absolute difference of each frame against the one before it.
+
+    ``frames`` is a ``(n, h, w)`` uint8 batch. ``previous`` is the last frame
+    of the preceding batch; without it the first frame scores 0.
+    """
+    if previous is not None:
+        frames = np.concatenate((previous[None], frames))
+    diffs = np.abs(np.diff(frames.astype(np.int16), axis=0))
+    scores = diffs.reshape(diffs.shape[0], -1).mean(axis=1) / 255.0
+    if previous is None:
+        scores = np.concatenate(([0.0], scores))
+    return scores
+
+
+def pick_cuts(
+    scores: np.ndarray,
+    fps: float = SCAN_FPS,
+    threshold: float = DEFAULT_THRESHOLD,
+    min_scene: float = DEFAULT_MIN_SCENE,
+) -> List[float]:
+    """Turn per-frame scores into cut times at least ``min_scene`` apart."""
+    min_gap = max(1, int(round(min_scene * fps)))
+    kept: List[int] = []
+    for idx in np.flatnonzero(scores >= threshold):
+        if idx < min_gap:
+            continue
+        if kept and idx - kept[-1] < min_gap:
+            # keep the stronger of two cuts that are too close together
+            if scores[idx] > scores[kept[-1]]:
+                kept[-1] = idx
+            continue
+        kept.append(idx)
+    return [round(float(idx) / fps, 3) for idx in kept]
+
+
+def detect_scenes(
+    source: str,
+    fps: float = SCAN_FPS,
+    threshold: float = DEFAULT_THRESHOLD,
+    min_scene: float = DEFAULT_MIN_SCENE,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> Tuple[List[float], float]:
+    """Decode ``source`` (path or URL) once and return ``(cuts, scanned_seconds)``.
+
+    Blocking; run it through the media scheduler. Raises
+    ``subprocess.TimeoutExpired`` if the decode takes longer than ``timeout``
+    seconds (a stalled URL, or a far longer file than expected).
+    """
+    frame_size = SCAN_WIDTH * SCAN_HEIGHT
+    batches = []
+    previous = None
+    frames_seen = 0
+    expired = threading.Event()
+    # stderr goes to a file rather than a pipe: nothing reads it while frames
+    # stream in, and a full stderr pipe would block ffmpeg and with it us
+    with tempfile.TemporaryFile() as errors:
+        proc = subprocess.Popen(scan_command(source, fps), stdout=subprocess.PIPE, stderr=errors)
+
+        def kill():
+            expired.set()
+            proc.kill()
+
+        watchdog = threading.Timer(timeout, kill)
+        watchdog.start()
+        try:
+            while True:
+                buf = proc.stdout.read(frame_size * BATCH_FRAMES)
+                usable = len(buf) - len(buf) % frame_size
+                if usable:
+                    frames = np.frombuffer(buf[:usable], dtype=np.uint8).reshape(-1, SCAN_HEIGHT, SCAN_WIDTH)
+                    batches.append(frame_scores(frames, previous))
+                    previous = frames[-1]
+                    frames_seen += frames.shape[0]
+                if len(buf) < frame_size * BATCH_FRAMES:
+                    break
+        finally:
+            watchdog.cancel()
+            proc.stdout.close()
+            returncode = proc.wait()
+        errors.seek(0)
+        stderr = errors.read()
+
+    if expired.is_set():
+        raise subprocess.TimeoutExpired(proc.args, timeout, stderr=stderr)
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, proc.args, stderr=stderr)
+
+    scores = np.concatenate(batches) if batches else np.zeros(0)
+    return pick_cuts(scores, fps, threshold, min_scene), frames_seen / fps
+
+
+def cuts_to_segments(cuts: List[float], duration: float) -> List[dict]:
+    """Split points -> ``SplitRequest``-shaped ``{"start", "end"}`` ranges."""
+    bounds = [0.0] + [c for c in cuts if 0 < c < duration] + [duration]
+    return [{"start": a, "end": b} for a, b in zip(bounds, bounds[1:]) if b > a]
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, ConfigDict,EmailStr
+from pydantic import BaseModel, ConfigDict,EmailStr, Field
 from typing import Optional, List
 from datetime import datetime
 PYDANTIC_V2 = hasattr(BaseModel, "model_config")
@@ -41,6 +41,7 @@ class VideoOut(BaseModel):
     status: str
     created_at: datetime
     segments: List[SegmentOut] = []
+    scene_cuts: Optional[List[float]] = None
 
     if PYDANTIC_V2:
         model_config = ConfigDict(from_attributes=True)
@@ -49,12 +50,47 @@ class VideoOut(BaseModel):
             orm_mode = True
 
 
+class VideoListOut(BaseModel):
+    items: List[VideoOut]
+    total: int
+    page: int
+    size: int
+    pages: int
+
+
 class VideoUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
     status: Optional[str] = None
 
 
+BATCH_MAX_IDS = 100  # ids accepted by the /videos/batch/* endpoints
+
+if PYDANTIC_V2:
+    _BATCH_ID_LIMITS = {"min_length": 1, "max_length": BATCH_MAX_IDS}
+else:
+    _BATCH_ID_LIMITS = {"min_items": 1, "max_items": BATCH_MAX_IDS}
+
+
+class BatchIds(BaseModel):
+    ids: List[str] = Field(..., **_BATCH_ID_LIMITS)
+
+
+class BatchUpdate(BaseModel):
+    ids: List[str] = Field(..., **_BATCH_ID_LIMITS)
+    changes: VideoUpdate
+
+
+class BatchItemResult(BaseModel):
+    id: str
+    status: int                      # per-item HTTP status: 200, 204 or 404
+    video: Optional[VideoOut] = None
+
+
+class BatchResult(BaseModel):
+    results: List[BatchItemResult]
+
+
 class Segment(BaseModel):
     start: float
     end: float
@@ -67,6 +103,12 @@ class SplitRequest(BaseModel):
 class SplitResult(BaseModel):
     segment_urls: list[str]
 
+
+class SceneDetectionResult(BaseModel):
+    cuts: list[float]
+    # ready to post as a SplitRequest
+    segments: list[Segment]
+
 # for user management
 class UserCreate(BaseModel):
     email: EmailStr
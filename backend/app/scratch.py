@@ -0,0 +1,221 @@
+import asyncio
+import math
+import os
+import shutil
+import tempfile
+from collections import deque
+from contextlib import asynccontextmanager
+from pathlib import Path
+from uuid import uuid4
+
+from fastapi import HTTPException
+
+from .config import load_env
+
+MB = 1024 * 1024
+
+
+class ScratchFull(HTTPException):
+    """No scratch space became free in time; rendered as 503 + Retry-After."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(
+            status_code=503,
+            detail="Temporary storage is full, retry later",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class ScratchTooLarge(HTTPException):
+    def __init__(self, nbytes: int, budget: int):
+        super().__init__(
+            status_code=507,
+            detail=f"Job needs {nbytes // MB} MB of temporary storage, the limit is {budget // MB} MB",
+        )
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ScratchSpace:
+    """Byte-budgeted temp directories for media jobs.
+
+    A job calls :meth:`reserve` with its worst-case disk footprint before it
+    writes anything. Reservations that fit the remaining budget start at
+    once; others wait in FIFO order for up to ``max_wait`` seconds and are
+    then rejected with 503, so a full volume turns into back-pressure
+    instead of ``ENOSPC`` in the middle of an ffmpeg run. Every job gets
+    its own directory under ``root`` named ``{pid}-{instance}-{job}``. The
+    directory is removed when the block exits, whether it succeeds, fails or
+    is cancelled, and :meth:`sweep` clears the leftovers of dead processes.
+    """
+
+    def __init__(self, root: Path, budget_bytes: int, max_wait: float = 30.0):
+        self.root = Path(root)
+        self.budget = max(1, budget_bytes)
+        self.max_wait = max_wait
+        self.instance = uuid4().hex[:8]
+
+        self._reserved = 0
+        self._jobs = 0
+        self._waiters: deque = deque()
+        self._peak = 0
+        self._rejected = 0
+        self._swept_bytes = 0
+
+    @classmethod
+    def from_env(cls) -> "ScratchSpace":
+        root = os.getenv("SCRATCH_DIR") or os.path.join(tempfile.gettempdir(), "videomgmt-scratch")
+        return cls(
+            root=Path(root),
+            budget_bytes=int(float(os.getenv("SCRATCH_BUDGET_MB", 2048)) * MB),
+            max_wait=float(os.getenv("SCRATCH_MAX_WAIT", 30)),
+        )
+
+    @property
+    def reserved(self) -> int:
+        return self._reserved
+
+    def _fits(self, nbytes: int) -> bool:
+        return self._reserved + nbytes <= self.budget
+
+    def _grant(self, nbytes: int) -> None:
+        self._reserved += nbytes
+        self._jobs += 1
+        self._peak = max(self._peak, self._reserved)
+
+    def _dispatch(self) -> None:
+        # strict FIFO: a large job at the head is not overtaken by small ones
+        while self._waiters:
+            nbytes, fut = self._waiters[0]
+            if fut.done():
+                self._waiters.popleft()
+                continue
+            if not self._fits(nbytes):
+                return
+            self._waiters.popleft()
+            self._grant(nbytes)
+            fut.set_result(None)
+
+    async def _acquire(self, nbytes: int) -> None:
+        if nbytes > self.budget:
+            self._rejected += 1
+            raise ScratchTooLarge(nbytes, self.budget)
+        if not self._waiters and self._fits(nbytes):
+            self._grant(nbytes)
+            return
+
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append((nbytes, fut))
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), self.max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if fut.done() and not fut.cancelled():
+                # space was granted just as we gave up; hand it back
+                self._release(nbytes)
+            else:
+                fut.cancel()
+                self._dispatch()
+            if isinstance(exc, asyncio.TimeoutError):
+                self._rejected += 1
+                raise ScratchFull(math.ceil(self.max_wait)) from None
+            raise
+
+    def _release(self, nbytes: int) -> None:
+        self._reserved -= nbytes
+        self._jobs -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def reserve(self, nbytes: int):
+        """Reserve ``nbytes`` and yield a fresh directory that is removed afterwards."""
+        nbytes = max(0, int(nbytes))
+        await self._acquire(nbytes)
+        path = self.root / f"{os.getpid()}-{self.instance}-{uuid4().hex}"
+        try:
+            path.mkdir(parents=True)
+            yield path
+        finally:
+            shutil.rmtree(path, ignore_errors=True)
+            self._release(nbytes)
+
+    def sweep(self) -> int:
+        """Remove job directories left behind by processes that are gone.
+
+        A directory with our own pid but another instance tag comes from a
+        previous run that happened to get the same pid (common as pid 1 in a
+        container). Returns the number of bytes freed.
+        """
+        if not self.root.is_dir():
+            return 0
+        freed = 0
+        for entry in self.root.iterdir():
+            pid, _, rest = entry.name.partition("-")
+            instance = rest.partition("-")[0]
+            if not pid.isdigit():
+                continue
+            if int(pid) == os.getpid():
+                if instance == self.instance:
+                    continue
+            elif _pid_alive(int(pid)):
+                continue
+            freed += _tree_size(entry)
+            if entry.is_dir():
+                shutil.rmtree(entry, ignore_errors=True)
+            else:
+                entry.unlink(missing_ok=True)
+        self._swept_bytes += freed
+        return freed
+
+    def stats(self) -> dict:
+        try:
+            disk_free = shutil.disk_usage(self.root).free
+        except OSError:
+            disk_free = None
+        return {
+            "root": str(self.root),
+            "budget_bytes": self.budget,
+            "reserved_bytes": self._reserved,
+            "peak_reserved_bytes": self._peak,
+            "jobs": self._jobs,
+            "waiting": sum(1 for _, fut in self._waiters if not fut.done()),
+            "rejected": self._rejected,
+            "swept_bytes": self._swept_bytes,
+            "disk_free_bytes": disk_free,
+        }
+
+
+def _tree_size(path: Path) -> int:
+    if path.is_file():
+        return path.stat().st_size
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+_scratch: ScratchSpace | None = None
+
+
+def get_scratch() -> ScratchSpace:
+    """Process-wide scratch space, configured from the environment on first use."""
+    global _scratch
+    if _scratch is None:
+        load_env()
+        _scratch = ScratchSpace.from_env()
+    return _scratch
+
+
+def sweep_scratch() -> int:
+    return get_scratch().sweep()
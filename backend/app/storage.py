@@ -4,7 +4,6 @@ from pathlib import Path
 import shutil
 
 VIDEOS_DIR = Path(__file__).parent / "videos"
-VIDEOS_DIR.mkdir(exist_ok=True)
 
 def upload_file_multipart(fileobj: BinaryIO, key: str, **kwargs) -> str:
     """Save uploaded file to local videos directory."""
@@ -1,39 +1,57 @@
 import os
 import asyncio
-import boto3
-from botocore.client import Config
+from functools import lru_cache
 from pathlib import Path
 from typing import Union
-from dotenv import load_dotenv
 
-load_dotenv()
+from .config import load_env
 
-R2_ACCESS_KEY = os.getenv("R2_ACCESS_KEY")
-R2_SECRET_KEY = os.getenv("R2_SECRET_KEY")
-R2_BUCKET_NAME = os.getenv("R2_BUCKET_NAME")
-R2_ENDPOINT_URL = os.getenv("R2_ENDPOINT_URL")
+_client = None
 
-if not all([R2_ACCESS_KEY, R2_SECRET_KEY, R2_BUCKET_NAME, R2_ENDPOINT_URL]):
-    raise EnvironmentError("R2 environment variables not set!")
 
+@lru_cache(maxsize=1)
+def _settings() -> dict:
+    load_env()
+    settings = {
+        "access_key": os.getenv("R2_ACCESS_KEY"),
+        "secret_key": os.getenv("R2_SECRET_KEY"),
+        "bucket": os.getenv("R2_BUCKET_NAME"),
+        "endpoint_url": os.getenv("R2_ENDPOINT_URL"),
+    }
+    if not all(settings.values()):
+        raise EnvironmentError("R2 environment variables not set!")
+    return settings
 
-def _make_client():
-    return boto3.client(
-        "s3",
-        region_name="auto",
-        endpoint_url=R2_ENDPOINT_URL,
-        aws_access_key_id=R2_ACCESS_KEY,
-        aws_secret_access_key=R2_SECRET_KEY,
-        config=Config(signature_version="s3v4"),
-    )
+
+def _get_client():
+    """Build the S3 client on first use and reuse it; boto3 clients are thread-safe."""
+    global _client
+    if _client is None:
+        # boto3 is slow to import, keep it off the startup path
+        import boto3
+        from botocore.client import Config
+
+        settings = _settings()
+        _client = boto3.client(
+            "s3",
+            region_name="auto",
+            endpoint_url=settings["endpoint_url"],
+            aws_access_key_id=settings["access_key"],
+            aws_secret_access_key=settings["secret_key"],
+            config=Config(signature_version="s3v4"),
+        )
+    return _client
+
+
+def _bucket() -> str:
+    return _settings()["bucket"]
 
 
 async def upload_file_to_r2(content: bytes, filename: str) -> str:
     """Upload raw bytes to R2 (for small files / upload from memory)."""
     def _upload():
-        client = _make_client()
-        client.put_object(
-            Bucket=R2_BUCKET_NAME,
+        _get_client().put_object(
+            Bucket=_bucket(),
             Key=filename,
             Body=content,
         )
@@ -45,9 +63,8 @@ async def upload_file_to_r2(content: bytes, filename: str) -> str:
 async def upload_file_path_to_r2(file_path: Path, filename: str) -> str:
     """Stream upload from a file path — memory efficient for large files."""
     def _upload():
-        client = _make_client()
         with open(file_path, "rb") as f:
-            client.upload_fileobj(f, R2_BUCKET_NAME, filename)
+            _get_client().upload_fileobj(f, _bucket(), filename)
 
     await asyncio.get_event_loop().run_in_executor(None, _upload)
     return filename
@@ -55,11 +72,31 @@ async def upload_file_path_to_r2(file_path: Path, filename: str) -> str:
 
 async def get_signed_url(filename: str, expires_in: int = 3600) -> str:
     def _sign():
-        client = _make_client()
-        return client.generate_presigned_url(
+        return _get_client().generate_presigned_url(
             "get_object",
-            Params={"Bucket": R2_BUCKET_NAME, "Key": filename},
+            Params={"Bucket": _bucket(), "Key": filename},
             ExpiresIn=expires_in,
         )
 
-    return await asyncio.get_event_loop().run_in_executor(None, _sign)
\ No newline at end of file
+    return await asyncio.get_event_loop().run_in_executor(None, _sign)
+
+
+async def get_object_size(filename: str) -> int:
+    """Size in bytes of an R2 object, from a HEAD request."""
+    def _head():
+        return _get_client().head_object(Bucket=_bucket(), Key=filename)["ContentLength"]
+
+    return await asyncio.get_event_loop().run_in_executor(None, _head)
+
+
+async def read_range(filename: str, offset: int, length: int) -> bytes:
+    """Up to ``length`` bytes of an R2 object starting at ``offset`` (HTTP Range GET)."""
+    def _read():
+        obj = _get_client().get_object(
+            Bucket=_bucket(),
+            Key=filename,
+            Range=f"bytes={offset}-{offset + length - 1}",
+        )
+        return obj["Body"].read()
+
+    return await asyncio.get_event_loop().run_in_executor(None, _read)
@@ -0,0 +1,175 @@
+import asyncio
+import struct
+import time
+import zlib
+from collections import deque
+from typing import AsyncIterator, Callable, Iterable, Tuple
+
+# Every entry is written in stored mode with ZIP64 sizes in its data
+# descriptor, so neither the CRC nor the size has to be known up front.
+_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+_DATA_DESCRIPTOR = struct.Struct("<IIQQ")
+_CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+_ZIP64_EOCD = struct.Struct("<IQHHIIQQQQ")
+_ZIP64_LOCATOR = struct.Struct("<IIQI")
+_EOCD = struct.Struct("<IHHHHIIH")
+
+_FLAGS = 0x0008 | 0x0800  # data descriptor follows, UTF-8 names
+_VERSION = 45             # ZIP64
+_MAX32 = 0xFFFFFFFF
+_MAX16 = 0xFFFF
+
+ChunkSource = Callable[[], AsyncIterator[bytes]]
+
+
+def _dos_datetime(ts: float) -> Tuple[int, int]:
+    t = time.localtime(ts)
+    dos_time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+    dos_date = ((max(t.tm_year, 1980) - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+    return dos_time, dos_date
+
+
+class _Entry:
+    __slots__ = ("name", "offset", "crc", "size", "dos_time", "dos_date")
+
+    def __init__(self, name: bytes, offset: int, dos_time: int, dos_date: int):
+        self.name = name
+        self.offset = offset
+        self.crc = 0
+        self.size = 0
+        self.dos_time = dos_time
+        self.dos_date = dos_date
+
+
+class ZipWriter:
+    """Builds a stored-mode ZIP archive incrementally, one byte chunk at a time.
+
+    Nothing is buffered: each method returns the bytes to emit next, so the
+    archive can be written straight into a streaming response.
+    """
+
+    def __init__(self):
+        self._offset = 0
+        self._entries: list[_Entry] = []
+        self._current: _Entry | None = None
+
+    def _emit(self, data: bytes) -> bytes:
+        self._offset += len(data)
+        return data
+
+    def start_file(self, name: str, mtime: float | None = None) -> bytes:
+        dos_time, dos_date = _dos_datetime(time.time() if mtime is None else mtime)
+        entry = _Entry(name.encode("utf-8"), self._offset, dos_time, dos_date)
+        self._current = entry
+        self._entries.append(entry)
+        # ZIP64 extra with zeroed sizes: the real ones go in the data descriptor
+        extra = struct.pack("<HHQQ", 0x0001, 16, 0, 0)
+        header = _LOCAL_HEADER.pack(
+            0x04034B50, _VERSION, _FLAGS, 0, entry.dos_time, entry.dos_date,
+            0, _MAX32, _MAX32, len(entry.name), len(extra),
+        )
+        return self._emit(header + entry.name + extra)
+
+    def write(self, chunk: bytes) -> bytes:
+        entry = self._current
+        entry.crc = zlib.crc32(chunk, entry.crc)
+        entry.size += len(chunk)
+        return self._emit(chunk)
+
+    def end_file(self) -> bytes:
+        entry, self._current = self._current, None
+        return self._emit(_DATA_DESCRIPTOR.pack(0x08074B50, entry.crc, entry.size, entry.size))
+
+    def finish(self) -> bytes:
+        cd_offset = self._offset
+        central = bytearray()
+        for e in self._entries:
+            zip64 = b""
+            size32 = e.size
+            offset32 = e.offset
+            if e.size >= _MAX32 or e.offset >= _MAX32:
+                zip64 = struct.pack("<HHQQQ", 0x0001, 24, e.size, e.size, e.offset)
+                size32 = offset32 = _MAX32
+            central += _CENTRAL_HEADER.pack(
+                0x02014B50, _VERSION, _VERSION, _FLAGS, 0, e.dos_time, e.dos_date,
+                e.crc, size32, size32, len(e.name), len(zip64), 0, 0, 0, 0, offset32,
+            )
+            central += e.name + zip64
+
+        cd_size = len(central)
+        count = len(self._entries)
+        tail = bytearray()
+        if count >= _MAX16 or cd_offset >= _MAX32 or cd_size >= _MAX32:
+            zip64_eocd_offset = cd_offset + cd_size
+            tail += _ZIP64_EOCD.pack(
+                0x06064B50, 44, _VERSION, _VERSION, 0, 0, count, count, cd_size, cd_offset,
+            )
+            tail += _ZIP64_LOCATOR.pack(0x07064B50, 0, zip64_eocd_offset, 1)
+        tail += _EOCD.pack(
+            0x06054B50, 0, 0,
+            min(count, _MAX16), min(count, _MAX16),
+            min(cd_size, _MAX32), min(cd_offset, _MAX32), 0,
+        )
+        return self._emit(bytes(central) + bytes(tail))
+
+
+async def stream_zip(
+    entries: Iterable[Tuple[str, ChunkSource]],
+    prefetch: int = 4,
+    buffer_chunks: int = 4,
+) -> AsyncIterator[bytes]:
+    """Yield a ZIP of ``entries`` while fetching up to ``prefetch`` of them ahead.
+
+    Each entry is ``(name, source)`` where ``source()`` returns an async
+    iterator of byte chunks. Entries are written in order; the following
+    ones are downloaded concurrently into queues of at most
+    ``buffer_chunks`` chunks, so memory stays bounded by
+    ``prefetch * buffer_chunks`` chunks whatever the archive size.
+    """
+    writer = ZipWriter()
+    pending = deque(entries)
+    window: deque = deque()
+
+    async def pump(source: ChunkSource, queue: asyncio.Queue):
+        try:
+            async for chunk in source():
+                await queue.put(chunk)
+            await queue.put(None)
+        except Exception as exc:  # surfaced to the consumer in order
+            await queue.put(exc)
+
+    def start_next():
+        name, source = pending.popleft()
+        queue = asyncio.Queue(maxsize=buffer_chunks)
+        window.append((name, queue, asyncio.create_task(pump(source, queue))))
+
+    current = None
+    try:
+        while pending and len(window) < max(1, prefetch):
+            start_next()
+
+        while window:
+            name, queue, task = window.popleft()
+            current = task
+            yield writer.start_file(name)
+            while True:
+                chunk = await queue.get()
+                if chunk is None:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield writer.write(chunk)
+            yield writer.end_file()
+            await task
+            current = None
+            if pending:
+                start_next()
+
+        yield writer.finish()
+    finally:
+        # the client may disconnect mid-entry: stop the entry being written
+        # as well as the prefetched ones, or their pumps block on a full queue
+        if current is not None:
+            current.cancel()
+        for _, _, task in window:
+            task.cancel()
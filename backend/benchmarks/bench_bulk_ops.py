@@ -0,0 +1,116 @@
+"""Benchmark: bulk /videos/batch/* endpoints vs. looping over single-item calls.
+
+Runs the app in-process against a SQLite file, the way the dashboard's
+multi-select actions would call it. For get, update and delete it compares
+N single-item requests with one batch request. ``--rtt`` adds a
+client-side delay per HTTP request to model network round trips. The
+database round trips are real, but they are local.
+
+Run from backend/:  python -m benchmarks.bench_bulk_ops --videos 100 --rtt 20
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+from uuid import uuid4
+
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db import Base, get_db
+from app.deps import get_current_user
+from app.main import create_app
+from app.models import User, Video, VideoSegment
+
+
+async def _seed(maker, user_id: str, count: int, segments: int) -> list:
+    ids = [uuid4().hex for _ in range(count)]
+    async with maker() as session:
+        for id in ids:
+            session.add(Video(
+                id=id, user_id=user_id, file_id=f"{id}.mp4", title="Bench", video_url=f"{id}.mp4",
+                duration=60.0, status="Draft", created_at=datetime.utcnow(), version=1,
+                updated_at=datetime.utcnow(),
+            ))
+            for i in range(segments):
+                session.add(VideoSegment(
+                    id=uuid4().hex, video_id=id, start=i, end=i + 1, segment_url=f"{id}-{i}.mp4",
+                ))
+        await session.commit()
+    return ids
+
+
+async def _timed(label: str, calls, rtt: float, count: int) -> float:
+    start = time.perf_counter()
+    for call in calls:
+        await asyncio.sleep(rtt)
+        response = await call()
+        assert response.status_code < 300, response.text
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed * 1000:9.1f} ms  {count / elapsed:8.0f} videos/s  ({len(calls)} requests)")
+    return elapsed
+
+
+async def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+        user = User(id=uuid4().hex, email="bench@example.com", password_hash="x")
+        async with maker() as session:
+            session.add(User(id=user.id, email=user.email, password_hash="x"))
+            await session.commit()
+
+        async def override_get_db():
+            async with maker() as session:
+                yield session
+
+        async def fake_signed_url(key, *a, **kw):
+            return f"https://r2.test/{key}"
+
+        app = create_app()
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_current_user] = lambda: user
+        rtt = args.rtt / 1000
+        n = args.videos
+
+        with patch("app.storage_r2.get_signed_url", side_effect=fake_signed_url):
+            async with AsyncClient(app=app, base_url="http://bench") as client:
+                ids = await _seed(maker, user.id, n, args.segments)
+                single = await _timed(
+                    "get: single-item loop", [lambda id=id: client.get(f"/videos/{id}") for id in ids], rtt, n)
+                batch = await _timed(
+                    "get: batch", [lambda: client.post("/videos/batch/get", json={"ids": ids})], rtt, n)
+                print(f"{'':<28} {single / batch:9.1f}x")
+
+                changes = {"status": "Ready"}
+                single = await _timed(
+                    "update: single-item loop",
+                    [lambda id=id: client.patch(f"/videos/{id}", json=changes) for id in ids], rtt, n)
+                batch = await _timed(
+                    "update: batch",
+                    [lambda: client.post("/videos/batch/update", json={"ids": ids, "changes": changes})], rtt, n)
+                print(f"{'':<28} {single / batch:9.1f}x")
+
+                single = await _timed(
+                    "delete: single-item loop",
+                    [lambda id=id: client.delete(f"/videos/{id}") for id in ids], rtt, n)
+                ids = await _seed(maker, user.id, n, args.segments)
+                batch = await _timed(
+                    "delete: batch", [lambda: client.post("/videos/batch/delete", json={"ids": ids})], rtt, n)
+                print(f"{'':<28} {single / batch:9.1f}x")
+
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--videos", type=int, default=100, help="ids per batch (max 100)")
+    parser.add_argument("--segments", type=int, default=3, help="segments per video")
+    parser.add_argument("--rtt", type=float, default=0.0, help="simulated network round trip, ms")
+    asyncio.run(main(parser.parse_args()))
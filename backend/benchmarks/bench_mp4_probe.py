@@ -0,0 +1,117 @@
+"""Benchmark: per-upload cost of reading the duration of an MP4.
+
+Compares the in-process moov parser (app.mp4meta) with the ffprobe path
+it replaces, which writes the upload to disk and spawns a process. With
+ffmpeg on PATH the clip is a real H.264/AAC file; otherwise a synthetic
+MP4 with the same box layout is used and the fallback is timed as disk
+write plus spawning ``true``, a lower bound for what ffprobe costs.
+
+Run from backend/:  python -m benchmarks.bench_mp4_probe --mb 50 --runs 20
+"""
+import argparse
+import shutil
+import struct
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from app import mp4meta
+
+
+def _box(kind: bytes, *parts: bytes) -> bytes:
+    body = b"".join(parts)
+    return struct.pack(">I", 8 + len(body)) + kind + body
+
+
+def _full(kind: bytes, *parts: bytes) -> bytes:
+    return _box(kind, b"\0" * 4, *parts)
+
+
+def _synthetic_clip(mb: int, seconds: int = 600) -> bytes:
+    """ftyp + mdat + moov (moov at the end, the worst case for a box walk)."""
+    frames = seconds * 30
+
+    def trak(track_id, handler, codec, timescale, samples, delta):
+        tkhd = _full(b"tkhd", struct.pack(">IIIII", 0, 0, track_id, 0, samples * delta),
+                     b"\0" * 52, struct.pack(">II", 1920 << 16, 1080 << 16))
+        mdhd = _full(b"mdhd", struct.pack(">IIII", 0, 0, timescale, samples * delta), b"\0" * 4)
+        hdlr = _full(b"hdlr", b"\0" * 4, handler, b"\0" * 12, b"\0")
+        stbl = _box(
+            b"stbl",
+            _full(b"stsd", struct.pack(">I", 1), _box(codec, b"\0" * 78)),
+            _full(b"stts", struct.pack(">III", 1, samples, delta)),
+            # a real per-sample size table, so the moov has realistic size
+            _full(b"stsz", struct.pack(">II", 0, samples), struct.pack(f">{samples}I", *([4000] * samples))),
+        )
+        return _box(b"trak", tkhd, _box(b"mdia", mdhd, hdlr, _box(b"minf", stbl)))
+
+    moov = _box(
+        b"moov",
+        _full(b"mvhd", struct.pack(">IIII", 0, 0, 1000, seconds * 1000), b"\0" * 80),
+        trak(1, b"vide", b"avc1", 15360, frames, 512),
+        trak(2, b"soun", b"mp4a", 48000, seconds * 48000 // 1024, 1024),
+    )
+    ftyp = _box(b"ftyp", b"isom", b"\0\0\2\0", b"isomiso2avc1mp41")
+    return ftyp + _box(b"mdat", b"\0" * (mb * 1024 * 1024)) + moov
+
+
+def _real_clip(mb: int) -> bytes:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "clip.mp4"
+        seconds = max(5, mb // 2)
+        subprocess.run(
+            ["ffmpeg", "-v", "error", "-y",
+             "-f", "lavfi", "-t", str(seconds), "-i", "testsrc2=size=1280x720:rate=30",
+             "-f", "lavfi", "-t", str(seconds), "-i", "sine",
+             "-c:v", "libx264", "-preset", "ultrafast", "-b:v", "8M", "-c:a", "aac", str(path)],
+            check=True,
+        )
+        return path.read_bytes()
+
+
+def _time(fn, runs: int) -> float:
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - start) / runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mb", type=int, default=50, help="upload size")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    has_ffprobe = shutil.which("ffmpeg") and shutil.which("ffprobe")
+    data = _real_clip(args.mb) if has_ffprobe else _synthetic_clip(args.mb)
+    print(f"clip: {len(data) / 1e6:.1f} MB ({'ffmpeg' if has_ffprobe else 'synthetic'})")
+
+    parsed = _time(lambda: mp4meta.probe_bytes(data), args.runs)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "upload.mp4"
+
+        def fallback():
+            path.write_bytes(data)
+            if has_ffprobe:
+                subprocess.run(
+                    ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+                     "-of", "default=nokey=1:noprint_wrappers=1", str(path)],
+                    check=True, stdout=subprocess.PIPE,
+                )
+            else:
+                subprocess.run(["true"], check=True)
+            path.unlink()
+
+        spawned = _time(fallback, args.runs)
+
+    label = "write + ffprobe" if has_ffprobe else "write + spawn (lower bound)"
+    print(f"{'moov parser':<28} {parsed * 1000:8.2f} ms/upload")
+    print(f"{label:<28} {spawned * 1000:8.2f} ms/upload")
+    print(f"{'saving':<28} {(spawned - parsed) * 1000:8.2f} ms/upload ({spawned / parsed:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
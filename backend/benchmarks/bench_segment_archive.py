@@ -0,0 +1,99 @@
+"""Benchmark: streamed segment ZIP vs. sequential per-segment downloads.
+
+Serves fake segments from a local aiohttp server that adds a fixed
+time-to-first-byte and a bandwidth cap per request, roughly what a client
+sees when it fetches R2 objects. Then it compares:
+
+* sequential: download every segment one after another, as the frontend
+  does today through /media/segments/{id};
+* archive: app.zipstream.stream_zip with the same concurrency as
+  GET /videos/{id}/segments/archive.
+
+Run from backend/:  python -m benchmarks.bench_segment_archive --segments 30
+"""
+import argparse
+import asyncio
+import time
+
+import aiohttp
+from aiohttp import web
+
+from app.zipstream import stream_zip
+
+CHUNK = 64 * 1024
+
+
+def _make_app(size: int, latency: float, bandwidth: float) -> web.Application:
+    payload = b"\0" * size
+
+    async def handler(request):
+        await asyncio.sleep(latency)
+        resp = web.StreamResponse(headers={"Content-Length": str(size)})
+        await resp.prepare(request)
+        for off in range(0, size, CHUNK):
+            chunk = payload[off:off + CHUNK]
+            await resp.write(chunk)
+            await asyncio.sleep(len(chunk) / bandwidth)
+        await resp.write_eof()
+        return resp
+
+    app = web.Application()
+    app.router.add_get("/{key}", handler)
+    return app
+
+
+async def _sequential(session, urls) -> int:
+    total = 0
+    for url in urls:
+        async with session.get(url) as resp:
+            async for chunk in resp.content.iter_chunked(CHUNK):
+                total += len(chunk)
+    return total
+
+
+async def _archive(session, urls, prefetch) -> int:
+    def source(url):
+        async def chunks():
+            async with session.get(url) as resp:
+                async for chunk in resp.content.iter_chunked(CHUNK):
+                    yield chunk
+
+        return chunks
+
+    total = 0
+    entries = [(f"{i:03d}.mp4", source(url)) for i, url in enumerate(urls, start=1)]
+    async for chunk in stream_zip(entries, prefetch=prefetch):
+        total += len(chunk)
+    return total
+
+
+async def main(args):
+    runner = web.AppRunner(_make_app(args.size, args.latency, args.bandwidth * 1024 * 1024))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    urls = [f"http://127.0.0.1:{port}/seg{i}" for i in range(args.segments)]
+
+    try:
+        async with aiohttp.ClientSession() as session:
+            for label, run in (
+                ("sequential", lambda: _sequential(session, urls)),
+                (f"archive (prefetch={args.prefetch})", lambda: _archive(session, urls, args.prefetch)),
+            ):
+                start = time.perf_counter()
+                nbytes = await run()
+                elapsed = time.perf_counter() - start
+                print(f"{label:<24} {elapsed:7.2f}s  {nbytes / elapsed / 1e6:8.1f} MB/s")
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--segments", type=int, default=30)
+    parser.add_argument("--size", type=int, default=4 * 1024 * 1024, help="bytes per segment")
+    parser.add_argument("--latency", type=float, default=0.08, help="seconds to first byte")
+    parser.add_argument("--bandwidth", type=float, default=40.0, help="MiB/s per request")
+    parser.add_argument("--prefetch", type=int, default=4)
+    asyncio.run(main(parser.parse_args()))
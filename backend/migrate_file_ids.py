@@ -1,54 +1,66 @@
 """
 Migration script to populate file_id for existing videos.
 Extracts file_id from video_url field.
+
+The work is done by alembic revisions 0005 (adds the column if missing) and
+0006 (batched, resumable backfill, see app/backfill.py); this script is a
+shortcut for ``alembic -x batch_size=N -x throttle=S upgrade 0006``. If it
+is interrupted, run it again to resume from the last checkpoint.
+
+``--restart`` ignores the checkpoint and walks the whole table again. Alembic
+never reruns an applied revision, so this part runs the 0006 backfill
+directly rather than through ``upgrade``.
 """
 
+import argparse
 import asyncio
-from sqlalchemy import text
-from sqlalchemy.exc import ProgrammingError
-from app.db import AsyncSessionLocal
+import os
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.backfill import DEFAULT_BATCH_SIZE
+from app.config import load_env
 
+BACKEND_DIR = Path(__file__).resolve().parent
 
-async def migrate_file_ids():
+
+def migrate_file_ids(batch_size: int = DEFAULT_BATCH_SIZE, throttle: float = 0.0, restart: bool = False):
     """Populate file_id from video_url for all existing videos."""
-    async with AsyncSessionLocal() as session:
-        try:
-            # First, try to add the file_id column if it doesn't exist
-            try:
-                await session.execute(text("""
-                    ALTER TABLE videos ADD COLUMN file_id VARCHAR UNIQUE;
-                """))
-                await session.commit()
-                print("✓ Added file_id column to videos table")
-            except ProgrammingError as e:
-                if "already exists" in str(e) or "duplicate" in str(e).lower():
-                    print("✓ file_id column already exists")
-                    await session.rollback()
-                else:
-                    raise
-            
-        except Exception as e:
-            print(f"✗ Error adding column: {e}")
-            await session.rollback()
-    
-    # Use a new session for the update
-    async with AsyncSessionLocal() as session:
-        try:
-            # Now populate file_id from video_url using raw SQL
-            result = await session.execute(text("""
-                UPDATE videos 
-                SET file_id = SUBSTRING(video_url FROM 9)
-                WHERE file_id IS NULL;
-            """))
-            await session.commit()
-            rows_updated = result.rowcount
-            print(f"✓ Updated {rows_updated} videos with file_id")
-                
-        except Exception as e:
-            print(f"✗ Error during migration: {e}")
-            await session.rollback()
-            raise
+    cfg = Config(str(BACKEND_DIR / "alembic.ini"))
+    cfg.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    cfg.cmd_opts = argparse.Namespace(x=[f"batch_size={batch_size}", f"throttle={throttle}"])
+    command.upgrade(cfg, "0006")
+    if restart:
+        asyncio.run(_rerun(cfg, batch_size, throttle))
+
+
+async def _rerun(cfg: Config, batch_size: int, throttle: float) -> int:
+    """Run the 0006 backfill again from the first row, ignoring its checkpoint."""
+    backfill = ScriptDirectory.from_config(cfg).get_revision("0006").module.FILE_IDS
+    load_env()
+    url = cfg.get_main_option("sqlalchemy.url") or os.getenv("DATABASE_URL")
+    if not url:
+        raise RuntimeError("DATABASE_URL not set in environment")
+    # same TLS requirement as migrations/env.py; autocommit so every batch commits
+    connect_args = {"ssl": True} if url.startswith("postgresql+asyncpg") else {}
+    engine = create_async_engine(url, connect_args=connect_args, isolation_level="AUTOCOMMIT")
+    try:
+        async with engine.connect() as connection:
+            return await connection.run_sync(
+                lambda sync: backfill.run(sync, batch_size=batch_size, throttle=throttle, restart=True)
+            )
+    finally:
+        await engine.dispose()
 
 
 if __name__ == "__main__":
-    asyncio.run(migrate_file_ids())
+    parser = argparse.ArgumentParser(description="Backfill videos.file_id from video_url.")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="rows per batch")
+    parser.add_argument("--throttle", type=float, default=0.0, help="seconds to pause between batches")
+    parser.add_argument("--restart", action="store_true", help="ignore the saved checkpoint")
+    args = parser.parse_args()
+    migrate_file_ids(args.batch_size, args.throttle, args.restart)
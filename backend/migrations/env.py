@@ -0,0 +1,52 @@
+import asyncio
+import os
+from logging.config import fileConfig
+
+from alembic import context
+from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import create_async_engine
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = None
+
+
+def _database_url() -> str:
+    load_dotenv()
+    url = config.get_main_option("sqlalchemy.url") or os.getenv("DATABASE_URL")
+    if not url:
+        raise RuntimeError("DATABASE_URL not set in environment")
+    return url
+
+
+def _connect_args(url: str) -> dict:
+    # same TLS requirement as app.db for the hosted Postgres
+    return {"ssl": True} if url.startswith("postgresql+asyncpg") else {}
+
+
+def run_migrations_offline():
+    context.configure(url=_database_url(), literal_binds=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def _run_sync(connection):
+    context.configure(connection=connection, transaction_per_migration=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_migrations_online():
+    url = _database_url()
+    engine = create_async_engine(url, connect_args=_connect_args(url))
+    async with engine.connect() as connection:
+        await connection.run_sync(_run_sync)
+    await engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    asyncio.run(run_migrations_online())
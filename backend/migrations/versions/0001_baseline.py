@@ -0,0 +1,64 @@
+"""Baseline schema as created by init_db().
+
+Databases created with Base.metadata.create_all already have these tables;
+they are left untouched, so the revision is safe to run on them as well.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("email", sa.String(), nullable=False),
+            sa.Column("password_hash", sa.String(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    if "videos" not in existing:
+        op.create_table(
+            "videos",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("user_id", sa.String(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("file_id", sa.String(), nullable=True),
+            sa.Column("title", sa.String(), nullable=False),
+            sa.Column("description", sa.String(), nullable=True),
+            sa.Column("video_url", sa.String(), nullable=False),
+            sa.Column("duration", sa.Float(), nullable=True),
+            sa.Column("status", sa.String(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_videos_id", "videos", ["id"])
+        op.create_index("ix_videos_file_id", "videos", ["file_id"], unique=True)
+
+    if "video_segments" not in existing:
+        op.create_table(
+            "video_segments",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("video_id", sa.String(), sa.ForeignKey("videos.id"), nullable=False),
+            sa.Column("start", sa.Float(), nullable=False),
+            sa.Column("end", sa.Float(), nullable=False),
+            sa.Column("segment_url", sa.String(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_video_segments_id", "video_segments", ["id"])
+
+
+def downgrade():
+    op.drop_table("video_segments")
+    op.drop_table("videos")
+    op.drop_table("users")
@@ -0,0 +1,35 @@
+"""Add videos.version and videos.updated_at for ETags.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("videos")}
+
+    if "version" not in columns:
+        op.add_column(
+            "videos",
+            sa.Column("version", sa.Integer(), nullable=False, server_default="1"),
+        )
+    if "updated_at" not in columns:
+        # no server default here: SQLite can't ADD COLUMN with a non-constant one
+        op.add_column("videos", sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True))
+        op.execute("UPDATE videos SET updated_at = created_at WHERE updated_at IS NULL")
+        if op.get_bind().dialect.name != "sqlite":
+            op.alter_column("videos", "updated_at", server_default=sa.func.now())
+
+
+def downgrade():
+    with op.batch_alter_table("videos") as batch:
+        batch.drop_column("updated_at")
+        batch.drop_column("version")
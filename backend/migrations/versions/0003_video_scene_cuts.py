@@ -0,0 +1,24 @@
+"""Add videos.scene_cuts for scene detection results.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("videos")}
+    if "scene_cuts" not in columns:
+        op.add_column("videos", sa.Column("scene_cuts", sa.JSON(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("videos") as batch:
+        batch.drop_column("scene_cuts")
@@ -0,0 +1,39 @@
+"""Add backfill_checkpoints and make sure videos.file_id exists.
+
+file_id used to be added by hand (migrate_file_ids.py); databases that
+never ran it get the column and its unique index here.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table("backfill_checkpoints"):
+        op.create_table(
+            "backfill_checkpoints",
+            sa.Column("name", sa.String(), primary_key=True),
+            sa.Column("last_key", sa.String(), nullable=True),
+            sa.Column("rows_done", sa.BigInteger(), nullable=False, server_default="0"),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        )
+
+    columns = {c["name"] for c in inspector.get_columns("videos")}
+    if "file_id" not in columns:
+        op.add_column("videos", sa.Column("file_id", sa.String(), nullable=True))
+        op.create_index("ix_videos_file_id", "videos", ["file_id"], unique=True)
+
+
+def downgrade():
+    op.drop_table("backfill_checkpoints")
@@ -0,0 +1,34 @@
+"""Backfill videos.file_id from video_url in resumable batches.
+
+Tune with ``alembic -x batch_size=500 -x throttle=0.2 upgrade head``;
+``-x restart=1`` ignores the checkpoint. See app/backfill.py.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+from app.backfill import Backfill, backfill_options
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+# video_url of legacy rows is "/videos/<file_id>"
+FILE_IDS = Backfill(
+    name="videos.file_id",
+    table="videos",
+    assignments="file_id = substr(video_url, 9)",
+    predicate="file_id IS NULL",
+)
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        FILE_IDS.run(op.get_bind(), **backfill_options())
+
+
+def downgrade():
+    pass
@@ -4,12 +4,15 @@ from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sess
 from sqlalchemy.pool import StaticPool
 from httpx import AsyncClient
 
-from unittest.mock import patch
+from unittest.mock import patch, AsyncMock
+from uuid import uuid4
 from subprocess import CompletedProcess
 from pathlib import Path
 import pytest
 
 from app.db import Base, get_db
+from app.deps import get_current_user
+from app.models import User
 from app.main import app
 
 TEST_DB_URL = "sqlite+aiosqlite:///:memory:"
@@ -35,6 +38,8 @@ async def db_session():
 
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
+    # close the aiosqlite worker thread, otherwise pytest hangs on exit
+    await engine.dispose()
 
 
 @pytest.fixture(scope="function")
@@ -65,4 +70,27 @@ def mock_subprocess():
             return CompletedProcess(args=cmd, returncode=0)
 
         mock_run.side_effect = side_effect
-        yield mock_run
\ No newline at end of file
+        yield mock_run
+
+
+@pytest.fixture
+async def auth_client(client, db_session):
+    """Client authenticated as a fresh user, with R2 calls stubbed out."""
+    user = User(id=uuid4().hex, email=f"{uuid4().hex}@example.com", password_hash="x")
+    db_session.add(user)
+    await db_session.commit()
+
+    app.dependency_overrides[get_current_user] = lambda: user
+
+    async def fake_signed_url(key, *args, **kwargs):
+        return f"https://r2.test/{key}"
+
+    async def fake_download(url, dest):
+        Path(dest).write_bytes(b"fake source video")
+
+    with patch("app.storage_r2.get_signed_url", side_effect=fake_signed_url), \
+            patch("app.storage_r2.upload_file_to_r2", new=AsyncMock()), \
+            patch("app.storage_r2.upload_file_path_to_r2", new=AsyncMock()), \
+            patch("app.storage_r2.get_object_size", new=AsyncMock(return_value=1024)), \
+            patch("app.main._download_source", side_effect=fake_download):
+        yield client
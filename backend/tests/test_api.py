@@ -1,3 +1,5 @@
+import io
+import zipfile
 import pytest
 from unittest.mock import patch
 from subprocess import CompletedProcess
@@ -6,7 +8,7 @@ from app.schemas import SplitRequest, SplitResult
 
 
 @pytest.mark.asyncio
-async def test_create_video_success(client):
+async def test_create_video_success(auth_client):
     # Already exists, can be reused
     with patch("subprocess.run") as mock_run:
         mock_run.return_value = CompletedProcess(
@@ -16,7 +18,7 @@ async def test_create_video_success(client):
             stderr="",
         )
 
-        response = await client.post(
+        response = await auth_client.post(
             "/videos",
             data={"title": "Test Video", "description": "Test description"},
             files={"file": ("test.mp4", b"fake video content", "video/mp4")},
@@ -30,13 +32,13 @@ async def test_create_video_success(client):
 
 
 @pytest.mark.asyncio
-async def test_get_video_not_found(client):
-    response = await client.get(f"/videos/{uuid4().hex}")
+async def test_get_video_not_found(auth_client):
+    response = await auth_client.get(f"/videos/{uuid4().hex}")
     assert response.status_code == 404
 
 
 @pytest.mark.asyncio
-async def test_update_video(client):
+async def test_update_video(auth_client):
     # Create a video first
     with patch("subprocess.run") as mock_run:
         mock_run.return_value = CompletedProcess(
@@ -45,7 +47,7 @@ async def test_update_video(client):
             stdout="15.0\n",
             stderr="",
         )
-        res = await client.post(
+        res = await auth_client.post(
             "/videos",
             data={"title": "Old Title"},
             files={"file": ("test.mp4", b"fake content", "video/mp4")},
@@ -54,7 +56,7 @@ async def test_update_video(client):
 
     # Update the title and description
     payload = {"title": "New Title", "description": "Updated desc"}
-    response = await client.patch(f"/videos/{video_id}", json=payload)
+    response = await auth_client.patch(f"/videos/{video_id}", json=payload)
     assert response.status_code == 200
     data = response.json()
     assert data["title"] == "New Title"
@@ -62,18 +64,18 @@ async def test_update_video(client):
 
 
 @pytest.mark.asyncio
-async def test_list_videos(client):
+async def test_list_videos(auth_client):
     # Create two videos
     with patch("subprocess.run") as mock_run:
         mock_run.return_value = CompletedProcess(args=["ffprobe"], returncode=0, stdout="10\n", stderr="")
         for i in range(2):
-            await client.post(
+            await auth_client.post(
                 "/videos",
                 data={"title": f"Video {i}"},
                 files={"file": ("test.mp4", b"content", "video/mp4")},
             )
 
-    response = await client.get("/videos?page=1&size=10")
+    response = await auth_client.get("/videos?page=1&size=10")
     assert response.status_code == 200
     data = response.json()
     assert "items" in data
@@ -82,7 +84,7 @@ async def test_list_videos(client):
 
 
 @pytest.mark.asyncio
-async def test_split_video(client):
+async def test_split_video(auth_client):
     # 1️⃣ Mock ffprobe to return a fixed duration
     with patch("subprocess.run") as mock_run_ffprobe:
         mock_run_ffprobe.return_value = CompletedProcess(
@@ -90,7 +92,7 @@ async def test_split_video(client):
         )
 
         # Create a video first
-        res = await client.post(
+        res = await auth_client.post(
             "/videos",
             data={"title": "Splittable Video"},
             files={"file": ("test.mp4", b"content", "video/mp4")},
@@ -113,7 +115,7 @@ async def test_split_video(client):
                 {"start": 5, "end": 10},
             ]
         }
-        response = await client.post(f"/videos/{video_id}/split", json=payload)
+        response = await auth_client.post(f"/videos/{video_id}/split", json=payload)
 
     assert response.status_code == 200
     data = response.json()
@@ -127,9 +129,9 @@ async def test_download_segment_not_found(client):
 
 
 @pytest.mark.asyncio
-async def test_split_video(client, mock_subprocess):
+async def test_split_video(auth_client, mock_subprocess):
     # Now you can just call /split without extra patches
-    res = await client.post(
+    res = await auth_client.post(
         "/videos",
         data={"title": "Splittable Video"},
         files={"file": ("test.mp4", b"content", "video/mp4")},
@@ -137,7 +139,172 @@ async def test_split_video(client, mock_subprocess):
     video_id = res.json()["id"]
 
     payload = {"segments": [{"start": 0, "end": 5}, {"start": 5, "end": 10}]}
-    response = await client.post(f"/videos/{video_id}/split", json=payload)
+    response = await auth_client.post(f"/videos/{video_id}/split", json=payload)
     assert response.status_code == 200
     data = response.json()
     assert len(data["segment_urls"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_get_video_etag_roundtrip(auth_client, mock_subprocess):
+    res = await auth_client.post(
+        "/videos",
+        data={"title": "Cached"},
+        files={"file": ("test.mp4", b"content", "video/mp4")},
+    )
+    video_id = res.json()["id"]
+
+    first = await auth_client.get(f"/videos/{video_id}")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    cached = await auth_client.get(f"/videos/{video_id}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+
+    await auth_client.patch(f"/videos/{video_id}", json={"title": "Changed"})
+    changed = await auth_client.get(f"/videos/{video_id}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_split_invalidates_video_etag(auth_client, mock_subprocess):
+    res = await auth_client.post(
+        "/videos",
+        data={"title": "To split"},
+        files={"file": ("test.mp4", b"content", "video/mp4")},
+    )
+    video_id = res.json()["id"]
+    etag = (await auth_client.get(f"/videos/{video_id}")).headers["etag"]
+    list_etag = (await auth_client.get("/videos")).headers["etag"]
+
+    split = await auth_client.post(
+        f"/videos/{video_id}/split", json={"segments": [{"start": 0, "end": 5}]}
+    )
+    assert split.status_code == 200
+
+    detail = await auth_client.get(f"/videos/{video_id}", headers={"If-None-Match": etag})
+    assert detail.status_code == 200
+    assert len(detail.json()["segments"]) == 1
+
+    listing = await auth_client.get("/videos", headers={"If-None-Match": list_etag})
+    assert listing.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_list_videos_etag_changes_on_new_video(auth_client, mock_subprocess):
+    await auth_client.post(
+        "/videos",
+        data={"title": "One"},
+        files={"file": ("test.mp4", b"content", "video/mp4")},
+    )
+    first = await auth_client.get("/videos")
+    etag = first.headers["etag"]
+
+    cached = await auth_client.get("/videos", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+
+    await auth_client.post(
+        "/videos",
+        data={"title": "Two"},
+        files={"file": ("test.mp4", b"content", "video/mp4")},
+    )
+    changed = await auth_client.get("/videos", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["total"] == 2
+
+
+@pytest.mark.asyncio
+async def test_download_segments_archive(auth_client, mock_subprocess):
+    res = await auth_client.post(
+        "/videos",
+        data={"title": "Archive me"},
+        files={"file": ("test.mp4", b"content", "video/mp4")},
+    )
+    video_id = res.json()["id"]
+    await auth_client.post(
+        f"/videos/{video_id}/split",
+        json={"segments": [{"start": 5, "end": 10}, {"start": 0, "end": 5}]},
+    )
+
+    def fake_source(session, key):
+        async def chunks():
+            yield f"bytes of {key}".encode()
+
+        return chunks
+
+    with patch("app.main._segment_source", side_effect=fake_source):
+        response = await auth_client.get(f"/videos/{video_id}/segments/archive")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(response.content)) as zf:
+        names = zf.namelist()
+        assert names == ["001_0-5.mp4", "002_5-10.mp4"]
+        assert zf.read(names[0]).startswith(b"bytes of ")
+
+
+@pytest.mark.asyncio
+async def test_download_segments_archive_without_segments(auth_client, mock_subprocess):
+    res = await auth_client.post(
+        "/videos",
+        data={"title": "Unsplit"},
+        files={"file": ("test.mp4", b"content", "video/mp4")},
+    )
+    response = await auth_client.get(f"/videos/{res.json()['id']}/segments/archive")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_detect_scenes_feeds_split(auth_client, mock_subprocess):
+    res = await auth_client.post(
+        "/videos",
+        data={"title": "Scenes"},
+        files={"file": ("test.mp4", b"content", "video/mp4")},
+    )
+    video_id = res.json()["id"]
+
+    with patch("app.scenes.detect_scenes", return_value=([4.0, 9.5], 20.0)):
+        detected = await auth_client.post(f"/videos/{video_id}/scenes")
+    assert detected.status_code == 200
+    body = detected.json()
+    assert body["cuts"] == [4.0, 9.5]
+    assert body["segments"][-1] == {"start": 9.5, "end": 20.0}
+
+    stored = await auth_client.get(f"/videos/{video_id}/scenes")
+    assert stored.json() == body
+
+    split = await auth_client.post(
+        f"/videos/{video_id}/split", json={"segments": body["segments"]}
+    )
+    assert split.status_code == 200
+    assert len(split.json()["segment_urls"]) == 3
+
+
+@pytest.mark.asyncio
+async def test_etags_roll_over_before_signed_urls_expire(auth_client, mock_subprocess):
+    from app.main import SIGNED_URL_TTL
+
+    res = await auth_client.post(
+        "/videos",
+        data={"title": "Aging"},
+        files={"file": ("test.mp4", b"content", "video/mp4")},
+    )
+    video_id = res.json()["id"]
+
+    start = 1_000 * SIGNED_URL_TTL
+    with patch("app.main.time.time", return_value=start):
+        etag = (await auth_client.get(f"/videos/{video_id}")).headers["etag"]
+        list_etag = (await auth_client.get("/videos")).headers["etag"]
+
+    with patch("app.main.time.time", return_value=start + SIGNED_URL_TTL // 2 - 1):
+        assert (await auth_client.get(f"/videos/{video_id}", headers={"If-None-Match": etag})).status_code == 304
+        assert (await auth_client.get("/videos", headers={"If-None-Match": list_etag})).status_code == 304
+
+    with patch("app.main.time.time", return_value=start + SIGNED_URL_TTL // 2):
+        detail = await auth_client.get(f"/videos/{video_id}", headers={"If-None-Match": etag})
+        listing = await auth_client.get("/videos", headers={"If-None-Match": list_etag})
+    assert detail.status_code == 200
+    assert detail.headers["etag"] != etag
+    assert listing.status_code == 200
@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from app.main import create_app
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def test_import_needs_no_credentials_and_does_no_setup():
+    env = {k: v for k, v in os.environ.items() if not k.startswith(("DATABASE_URL", "R2_"))}
+    code = (
+        "import sys, app.main, app.db, app.storage_r2, app.media_scheduler\n"
+        "assert app.db._engine is None\n"
+        "assert app.storage_r2._client is None\n"
+        "assert app.media_scheduler._scheduler is None\n"
+        "assert 'boto3' not in sys.modules and 'numpy' not in sys.modules\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=BACKEND_DIR, env={**env, "PYTHONPATH": str(BACKEND_DIR)},
+        capture_output=True, text=True,
+    )
+    assert result.returncode == 0, result.stderr
+
+
+@pytest.mark.asyncio
+async def test_create_app_serves_healthz():
+    from httpx import AsyncClient
+
+    async with AsyncClient(app=create_app(), base_url="http://test") as c:
+        response = await c.get("/healthz")
+    assert response.json() == {"status": "ok"}
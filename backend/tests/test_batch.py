@@ -0,0 +1,99 @@
+import pytest
+from uuid import uuid4
+
+from app.models import Video
+
+
+async def _upload(client, title):
+    res = await client.post(
+        "/videos", data={"title": title}, files={"file": ("test.mp4", b"content", "video/mp4")}
+    )
+    return res.json()["id"]
+
+
+@pytest.mark.asyncio
+async def test_batch_get_returns_per_id_results(auth_client, mock_subprocess, db_session):
+    first = await _upload(auth_client, "One")
+    second = await _upload(auth_client, "Two")
+    # a video owned by someone else must look exactly like a missing one
+    foreign = Video(id=uuid4().hex, user_id="someone-else", title="Theirs", video_url="x", status="Draft")
+    db_session.add(foreign)
+    await db_session.commit()
+
+    response = await auth_client.post(
+        "/videos/batch/get", json={"ids": [second, "missing", foreign.id, first, second]}
+    )
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [(r["id"], r["status"]) for r in results] == [
+        (second, 200), ("missing", 404), (foreign.id, 404), (first, 200),
+    ]
+    assert results[0]["video"]["title"] == "Two"
+    assert results[0]["video"]["video_url"].startswith("https://r2.test/")
+    assert results[1]["video"] is None
+
+
+@pytest.mark.asyncio
+async def test_batch_update_bumps_versions(auth_client, mock_subprocess):
+    ids = [await _upload(auth_client, f"Video {i}") for i in range(3)]
+    etag = (await auth_client.get(f"/videos/{ids[0]}")).headers["ETag"]
+
+    response = await auth_client.post(
+        "/videos/batch/update",
+        json={"ids": ids[:2] + ["missing"], "changes": {"status": "Ready"}},
+    )
+
+    assert [r["status"] for r in response.json()["results"]] == [200, 200, 404]
+    statuses = [(await auth_client.get(f"/videos/{id}")).json()["status"] for id in ids]
+    assert statuses == ["Ready", "Ready", "Draft"]
+    assert (await auth_client.get(f"/videos/{ids[0]}")).headers["ETag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_batch_delete_removes_videos_and_segments(auth_client, mock_subprocess):
+    ids = [await _upload(auth_client, f"Video {i}") for i in range(2)]
+    await auth_client.post(f"/videos/{ids[0]}/split", json={"segments": [{"start": 0, "end": 5}]})
+
+    response = await auth_client.post("/videos/batch/delete", json={"ids": ids + ["missing"]})
+
+    assert [r["status"] for r in response.json()["results"]] == [204, 204, 404]
+    for id in ids:
+        assert (await auth_client.get(f"/videos/{id}")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_batch_rejects_empty_and_oversized_requests(auth_client):
+    assert (await auth_client.post("/videos/batch/get", json={"ids": []})).status_code == 422
+    too_many = {"ids": [str(i) for i in range(101)]}
+    assert (await auth_client.post("/videos/batch/delete", json=too_many)).status_code == 422
+    too_many_changes = {**too_many, "changes": {"status": "Ready"}}
+    assert (await auth_client.post("/videos/batch/update", json=too_many_changes)).status_code == 422
+    no_changes = {"ids": ["a"], "changes": {}}
+    assert (await auth_client.post("/videos/batch/update", json=no_changes)).status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_batch_update_rejects_null_for_required_fields(auth_client, mock_subprocess):
+    id = await _upload(auth_client, "Keep me")
+
+    for changes in ({"title": None}, {"status": None, "description": "x"}):
+        response = await auth_client.post("/videos/batch/update", json={"ids": [id], "changes": changes})
+        assert response.status_code == 422
+
+    cleared = await auth_client.post(
+        "/videos/batch/update", json={"ids": [id], "changes": {"description": None}}
+    )
+    assert cleared.json()["results"][0]["status"] == 200
+    video = (await auth_client.get(f"/videos/{id}")).json()
+    assert (video["title"], video["description"]) == ("Keep me", None)
+
+
+@pytest.mark.asyncio
+async def test_delete_video_removes_segments(auth_client, mock_subprocess):
+    id = await _upload(auth_client, "Single")
+    await auth_client.post(f"/videos/{id}/split", json={"segments": [{"start": 0, "end": 5}]})
+
+    assert (await auth_client.delete(f"/videos/{id}")).status_code == 204
+    assert (await auth_client.get(f"/videos/{id}")).status_code == 404
+    assert (await auth_client.delete(f"/videos/{id}")).status_code == 404
@@ -0,0 +1,140 @@
+import asyncio
+import os
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import idempotency
+from app.db import Base
+from app.models import IdempotencyKey
+
+
+@pytest.mark.asyncio
+async def test_upload_with_same_key_is_replayed(auth_client, mock_subprocess):
+    request = dict(data={"title": "Once"}, files={"file": ("test.mp4", b"content", "video/mp4")})
+    headers = {"Idempotency-Key": "upload-1"}
+
+    first = await auth_client.post("/videos", headers=headers, **request)
+    second = await auth_client.post("/videos", headers=headers, **request)
+
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert mock_subprocess.call_count == 1
+
+    listing = await auth_client.get("/videos")
+    assert listing.json()["total"] == 1
+
+
+@pytest.mark.asyncio
+async def test_key_reused_for_different_request_is_rejected(auth_client, mock_subprocess):
+    headers = {"Idempotency-Key": "upload-2"}
+    files = {"file": ("test.mp4", b"content", "video/mp4")}
+
+    await auth_client.post("/videos", headers=headers, data={"title": "A"}, files=files)
+    response = await auth_client.post("/videos", headers=headers, data={"title": "B"}, files=files)
+
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_split_retry_after_failure_runs_again_then_replays(auth_client, mock_subprocess):
+    res = await auth_client.post(
+        "/videos", data={"title": "Split me"}, files={"file": ("test.mp4", b"content", "video/mp4")}
+    )
+    video_id = res.json()["id"]
+    body = {"segments": [{"start": 0, "end": 5}, {"start": 5, "end": 10}]}
+    headers = {"Idempotency-Key": "split-1"}
+
+    with patch("app.storage_r2.get_object_size", side_effect=RuntimeError("R2 down")):
+        with pytest.raises(RuntimeError):
+            await auth_client.post(f"/videos/{video_id}/split", json=body, headers=headers)
+
+    first = await auth_client.post(f"/videos/{video_id}/split", json=body, headers=headers)
+    ffmpeg_runs = mock_subprocess.call_count
+    second = await auth_client.post(f"/videos/{video_id}/split", json=body, headers=headers)
+
+    assert first.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert mock_subprocess.call_count == ffmpeg_runs
+
+    video = (await auth_client.get(f"/videos/{video_id}")).json()
+    assert len(video["segments"]) == 2
+
+
+@pytest.fixture
+async def sessions(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'idem.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with maker() as a, maker() as b:
+        yield a, b
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_retry_waits_for_in_flight_attempt(sessions):
+    a, b = sessions
+    claim = await idempotency.claim(a, "k", "u1", "scope", "hash")
+
+    with patch.object(idempotency, "POLL_SECONDS", 0.01):
+        retry = asyncio.create_task(idempotency.claim(b, "k", "u1", "scope", "hash"))
+        await asyncio.sleep(0.05)
+        assert not retry.done()
+
+        await claim.complete(a, 201, {"id": "v1"})
+        await a.commit()
+        replay = await asyncio.wait_for(retry, 5)
+
+    assert isinstance(replay, JSONResponse)
+    assert replay.status_code == 201
+    assert replay.headers["Idempotent-Replayed"] == "true"
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_taken_over(sessions):
+    a, b = sessions
+    stale = await idempotency.claim(a, "k", "u1", "scope", "hash")
+    await a.execute(
+        update(IdempotencyKey).values(locked_until=datetime.utcnow() - timedelta(seconds=1))
+    )
+    await a.commit()
+
+    fresh = await idempotency.claim(b, "k", "u1", "scope", "hash")
+    assert isinstance(fresh, idempotency.Claim)
+    assert fresh.owner != stale.owner
+
+    # the presumed-dead attempt can no longer complete the key
+    with pytest.raises(HTTPException) as exc:
+        await stale.complete(a, 200, {"stale": True})
+    assert exc.value.status_code == 409
+    await stale.abandon(a)
+    await fresh.complete(b, 200, {"fresh": True})
+    await b.commit()
+    replay = await idempotency.claim(a, "k", "u1", "scope", "hash")
+    assert replay.body == b'{"fresh":true}'
+
+
+@pytest.mark.asyncio
+async def test_running_attempt_keeps_its_lease(sessions):
+    a, b = sessions
+    with patch.dict(os.environ, {"IDEMPOTENCY_LEASE_SECONDS": "0.3", "IDEMPOTENCY_WAIT_SECONDS": "0"}):
+        claim = await idempotency.claim(a, "k", "u1", "scope", "hash")
+        async with claim.held(a.bind):
+            await asyncio.sleep(0.6)  # twice the lease
+            with pytest.raises(HTTPException) as exc:
+                await idempotency.claim(b, "k", "u1", "scope", "hash")
+            assert exc.value.status_code == 409
+
+        await asyncio.sleep(0.4)  # no longer renewed
+        taken = await idempotency.claim(b, "k", "u1", "scope", "hash")
+    assert isinstance(taken, idempotency.Claim)
+    assert taken.owner != claim.owner
@@ -0,0 +1,48 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import patch
+
+from app.loop_monitor import LoopMonitor
+
+
+def blocking_call():
+    time.sleep(0.3)
+
+
+@pytest.mark.asyncio
+async def test_loop_monitor_captures_blocking_stack():
+    monitor = LoopMonitor(interval=0.01, threshold=0.05)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        blocking_call()
+        await asyncio.sleep(0.05)
+    finally:
+        await monitor.stop()
+
+    snap = monitor.snapshot()
+    assert snap["samples"] > 0
+    assert snap["lag_max_ms"] >= 200
+    assert snap["histogram"][">2500ms"] == 0
+    top = snap["top_offenders"][0]
+    assert "blocking_call" in top["stack"]
+    assert top["count"] == 1
+    assert top["max_blocked_ms"] >= 100
+
+
+@pytest.mark.asyncio
+async def test_admin_loop_lag_requires_token(client, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    monitor = LoopMonitor()
+
+    with patch("app.admin.get_monitor", return_value=monitor):
+        denied = await client.get("/admin/loop-lag", headers={"X-Admin-Token": "wrong"})
+        allowed = await client.get("/admin/loop-lag", headers={"X-Admin-Token": "secret"})
+
+    assert denied.status_code == 403
+    assert allowed.status_code == 200
+    assert "histogram" in allowed.json()
+
+    monkeypatch.delenv("ADMIN_TOKEN")
+    assert (await client.get("/admin/loop-lag", headers={"X-Admin-Token": "secret"})).status_code == 404
@@ -0,0 +1,115 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+
+from app.media_scheduler import MediaScheduler, MediaBusy
+
+
+@pytest.mark.asyncio
+async def test_scheduler_rejects_when_queue_full():
+    sched = MediaScheduler(max_concurrency=1, max_queue=1, max_per_user=1)
+    release = asyncio.Event()
+
+    async def job(user):
+        async with sched.slot(user):
+            await release.wait()
+
+    running = asyncio.create_task(job("a"))
+    queued = asyncio.create_task(job("b"))
+    await asyncio.sleep(0)
+
+    with pytest.raises(MediaBusy) as exc:
+        async with sched.slot("c"):
+            pass
+    assert exc.value.status_code == 429
+    assert int(exc.value.headers["Retry-After"]) >= 1
+
+    release.set()
+    await asyncio.gather(running, queued)
+    assert sched.stats()["running"] == 0
+
+
+@pytest.mark.asyncio
+async def test_scheduler_round_robins_between_users():
+    sched = MediaScheduler(max_concurrency=1, max_queue=10, max_per_user=1)
+    release = asyncio.Event()
+    order = []
+
+    async def job(user):
+        async with sched.slot(user):
+            order.append(user)
+            await release.wait()
+
+    # user "a" floods the queue first, user "b" arrives afterwards
+    tasks = [asyncio.create_task(job("a")) for _ in range(3)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(job("b")))
+    await asyncio.sleep(0)
+
+    release.set()
+    await asyncio.gather(*tasks)
+
+    assert order.index("b") <= 2
+
+
+@pytest.mark.asyncio
+async def test_scheduler_cancelled_waiter_frees_queue():
+    sched = MediaScheduler(max_concurrency=1, max_queue=1, max_per_user=1)
+    release = asyncio.Event()
+
+    async def job(user):
+        async with sched.slot(user):
+            await release.wait()
+
+    running = asyncio.create_task(job("a"))
+    queued = asyncio.create_task(job("b"))
+    await asyncio.sleep(0)
+    queued.cancel()
+    await asyncio.gather(queued, return_exceptions=True)
+    assert sched.waiting == 0
+
+    release.set()
+    await running
+
+
+@pytest.mark.asyncio
+async def test_scheduler_one_user_cannot_fill_queue_for_others():
+    sched = MediaScheduler(max_concurrency=4, max_queue=4, max_per_user=2)
+    release = asyncio.Event()
+
+    async def job(user):
+        async with sched.slot(user):
+            await release.wait()
+
+    flood = [asyncio.create_task(job("a")) for _ in range(4)]
+    await asyncio.sleep(0)
+    assert sched.stats()["running"] == 2
+    assert sched.waiting == 2
+
+    with pytest.raises(MediaBusy):
+        async with sched.slot("a"):
+            pass
+
+    # a free slot goes straight to another user even while "a" is queued
+    other = asyncio.create_task(job("b"))
+    await asyncio.sleep(0)
+    assert sched.stats()["running"] == 3
+
+    release.set()
+    await asyncio.gather(*flood, other)
+
+
+@pytest.mark.asyncio
+async def test_create_video_returns_429_when_media_queue_full(auth_client, mock_subprocess):
+    sched = MediaScheduler(max_concurrency=1, max_queue=0, max_per_user=1)
+
+    with patch("app.main.get_scheduler", return_value=sched):
+        async with sched.slot("someone-else"):
+            response = await auth_client.post(
+                "/videos",
+                data={"title": "Busy"},
+                files={"file": ("test.mp4", b"content", "video/mp4")},
+            )
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
@@ -0,0 +1,153 @@
+import argparse
+import sqlite3
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+import pytest
+import sqlalchemy as sa
+
+from app.backfill import Backfill
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def _alembic_config(db_path: Path) -> Config:
+    cfg = Config(str(BACKEND_DIR / "alembic.ini"))
+    cfg.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    cfg.set_main_option("sqlalchemy.url", f"sqlite+aiosqlite:///{db_path}")
+    return cfg
+
+
+def _columns(db_path: Path, table: str) -> set:
+    engine = sa.create_engine(f"sqlite:///{db_path}")
+    try:
+        return {c["name"] for c in sa.inspect(engine).get_columns(table)}
+    finally:
+        engine.dispose()
+
+
+def test_upgrade_adds_version_columns_to_existing_videos(tmp_path):
+    db_path = tmp_path / "legacy.db"
+    with sqlite3.connect(db_path) as conn:
+        # schema as create_all() built it before videos were versioned
+        conn.executescript(
+            """
+            CREATE TABLE users (id VARCHAR PRIMARY KEY, email VARCHAR NOT NULL,
+                                password_hash VARCHAR NOT NULL, created_at DATETIME);
+            CREATE TABLE videos (id VARCHAR PRIMARY KEY, user_id VARCHAR NOT NULL,
+                                 file_id VARCHAR, title VARCHAR NOT NULL, description VARCHAR,
+                                 video_url VARCHAR NOT NULL, duration FLOAT,
+                                 status VARCHAR NOT NULL, created_at DATETIME);
+            CREATE TABLE video_segments (id VARCHAR PRIMARY KEY, video_id VARCHAR NOT NULL,
+                                         start FLOAT NOT NULL, "end" FLOAT NOT NULL,
+                                         segment_url VARCHAR NOT NULL, created_at DATETIME);
+            INSERT INTO users VALUES ('u1', 'a@example.com', 'x', '2024-01-01 00:00:00');
+            INSERT INTO videos VALUES ('v1', 'u1', 'f1', 'Old', NULL, 'f1', 3.0, 'Draft',
+                                       '2024-01-01 00:00:00');
+            """
+        )
+
+    command.upgrade(_alembic_config(db_path), "head")
+
+    assert {"version", "updated_at"} <= _columns(db_path, "videos")
+    with sqlite3.connect(db_path) as conn:
+        version, updated_at = conn.execute("SELECT version, updated_at FROM videos").fetchone()
+    assert version == 1
+    assert updated_at == "2024-01-01 00:00:00"
+
+
+def test_upgrade_creates_schema_on_empty_database(tmp_path):
+    db_path = tmp_path / "fresh.db"
+    command.upgrade(_alembic_config(db_path), "head")
+
+    assert {"id", "file_id", "version", "updated_at"} <= _columns(db_path, "videos")
+    assert "segment_url" in _columns(db_path, "video_segments")
+    assert {"key", "request_hash", "response_body"} <= _columns(db_path, "idempotency_keys")
+
+
+LEGACY_WITHOUT_FILE_ID = """
+CREATE TABLE users (id VARCHAR PRIMARY KEY, email VARCHAR NOT NULL,
+                    password_hash VARCHAR NOT NULL, created_at DATETIME);
+CREATE TABLE videos (id VARCHAR PRIMARY KEY, user_id VARCHAR NOT NULL,
+                     title VARCHAR NOT NULL, description VARCHAR,
+                     video_url VARCHAR NOT NULL, duration FLOAT,
+                     status VARCHAR NOT NULL, created_at DATETIME);
+"""
+
+
+def _legacy_videos(db_path: Path, count: int):
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(LEGACY_WITHOUT_FILE_ID)
+        conn.executemany(
+            "INSERT INTO videos VALUES (?, 'u1', 'Old', NULL, ?, 1.0, 'Draft', '2024-01-01 00:00:00')",
+            [(f"v{i:03d}", f"/videos/f{i}.mp4") for i in range(count)],
+        )
+
+
+def test_upgrade_backfills_file_ids_in_batches(tmp_path):
+    db_path = tmp_path / "legacy.db"
+    _legacy_videos(db_path, 25)
+
+    cfg = _alembic_config(db_path)
+    cfg.cmd_opts = argparse.Namespace(x=["batch_size=10"])
+    command.upgrade(cfg, "head")
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT count(*) FROM videos WHERE file_id IS NULL").fetchone() == (0,)
+        assert conn.execute("SELECT file_id FROM videos WHERE id = 'v007'").fetchone() == ("f7.mp4",)
+        last_key, rows_done, completed_at = conn.execute(
+            "SELECT last_key, rows_done, completed_at FROM backfill_checkpoints"
+        ).fetchone()
+    assert (last_key, rows_done) == ("v024", 25)
+    assert completed_at is not None
+
+
+def test_backfill_resumes_from_checkpoint(tmp_path):
+    db_path = tmp_path / "legacy.db"
+    _legacy_videos(db_path, 25)
+    command.upgrade(_alembic_config(db_path), "0005")
+
+    backfill = Backfill("test", "videos", "file_id = substr(video_url, 9)", "file_id IS NULL")
+    engine = sa.create_engine(f"sqlite:///{db_path}", isolation_level="AUTOCOMMIT")
+    messages = []
+
+    def crash_after_first_batch(message):
+        messages.append(message)
+        raise RuntimeError("interrupted")
+
+    try:
+        with engine.connect() as conn:
+            with pytest.raises(RuntimeError):
+                backfill.run(conn, batch_size=10, progress=crash_after_first_batch)
+            resumed = backfill.run(conn, batch_size=10, progress=messages.append)
+            again = backfill.run(conn, batch_size=10, progress=messages.append)
+    finally:
+        engine.dispose()
+
+    assert resumed == 15
+    assert again == 0
+    assert "resuming after id=v009 (10 rows done)" in messages[1]
+    assert "already completed (25 rows)" in messages[-1]
+
+
+def test_migrate_file_ids_restart_reruns_completed_backfill(tmp_path, monkeypatch):
+    from migrate_file_ids import migrate_file_ids
+
+    db_path = tmp_path / "legacy.db"
+    _legacy_videos(db_path, 25)
+    monkeypatch.setenv("DATABASE_URL", f"sqlite+aiosqlite:///{db_path}")
+    migrate_file_ids(batch_size=10)
+
+    # a row the completed run no longer covers, behind its checkpoint
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE videos SET file_id = NULL WHERE id = 'v003'")
+
+    migrate_file_ids(batch_size=10)
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT file_id FROM videos WHERE id = 'v003'").fetchone() == (None,)
+
+    migrate_file_ids(batch_size=10, restart=True)
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT file_id FROM videos WHERE id = 'v003'").fetchone() == ("f3.mp4",)
+        assert conn.execute("SELECT rows_done FROM backfill_checkpoints").fetchone() == (1,)
@@ -0,0 +1,117 @@
+import struct
+import pytest
+from unittest.mock import patch
+
+from app import mp4meta
+
+
+def box(kind: bytes, *parts: bytes) -> bytes:
+    body = b"".join(parts)
+    return struct.pack(">I", 8 + len(body)) + kind + body
+
+
+def full(kind: bytes, version: int, *parts: bytes) -> bytes:
+    return box(kind, bytes([version, 0, 0, 0]), *parts)
+
+
+def trak(track_id, handler, codec, timescale, samples, delta, width=0, height=0, version=0):
+    # tkhd: ids and duration, then reserved/layer/volume/matrix, then 16.16 width/height
+    size = struct.pack(">II", width << 16, height << 16)
+    if version == 1:
+        tkhd = full(b"tkhd", 1, struct.pack(">QQIIQ", 0, 0, track_id, 0, samples * delta), b"\0" * 52, size)
+        mdhd = full(b"mdhd", 1, struct.pack(">QQIQ", 0, 0, timescale, samples * delta), b"\0" * 4)
+    else:
+        tkhd = full(b"tkhd", 0, struct.pack(">IIIII", 0, 0, track_id, 0, samples * delta), b"\0" * 52, size)
+        mdhd = full(b"mdhd", 0, struct.pack(">IIII", 0, 0, timescale, samples * delta), b"\0" * 4)
+    stbl = box(
+        b"stbl",
+        full(b"stsd", 0, struct.pack(">I", 1), box(codec, b"\0" * 78)),
+        full(b"stts", 0, struct.pack(">III", 1, samples, delta)),
+        full(b"stsz", 0, struct.pack(">II", 1000, samples)),
+    )
+    hdlr = full(b"hdlr", 0, b"\0" * 4, handler, b"\0" * 12, b"name\0")
+    return box(b"trak", tkhd, box(b"mdia", mdhd, hdlr, box(b"minf", stbl)))
+
+
+def movie(seconds=12.5, version=0, extra=b""):
+    if version == 1:
+        mvhd = full(b"mvhd", 1, struct.pack(">QQIQ", 0, 0, 1000, int(seconds * 1000)), b"\0" * 80)
+    else:
+        mvhd = full(b"mvhd", 0, struct.pack(">IIII", 0, 0, 1000, int(seconds * 1000)), b"\0" * 80)
+    frames = int(seconds * 30)
+    return box(
+        b"moov",
+        mvhd,
+        trak(1, b"vide", b"avc1", 15360, frames, 512, 1280, 720, version),
+        trak(2, b"soun", b"mp4a", 48000, int(seconds * 48000 / 1024), 1024, version=version),
+        extra,
+    )
+
+
+FTYP = box(b"ftyp", b"isom", struct.pack(">I", 512), b"isomiso2avc1mp41")
+
+
+def test_probe_faststart_file():
+    data = FTYP + movie() + box(b"mdat", b"\0" * 4096)
+    info = mp4meta.probe_bytes(data)
+
+    assert info.duration == 12.5
+    video, audio = info.tracks
+    assert (video.kind, video.codec, video.width, video.height) == ("video", "avc1", 1280, 720)
+    assert video.frame_rate == 30.0
+    assert video.sample_count == 375
+    assert (audio.kind, audio.codec, audio.width) == ("audio", "mp4a", None)
+
+
+def test_probe_moov_at_end_after_64bit_mdat():
+    mdat = struct.pack(">I4sQ", 1, b"mdat", 16 + 4096) + b"\0" * 4096
+    info = mp4meta.probe_bytes(FTYP + mdat + movie(seconds=3.0, version=1))
+    assert info.duration == 3.0
+    assert info.tracks[0].duration == pytest.approx(3.0, abs=0.05)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"fake video content",
+        b"",
+        FTYP + box(b"mdat", b"\0" * 16),                                   # no moov
+        FTYP + movie(extra=box(b"mvex")),                                  # fragmented
+        FTYP + movie()[:60],                                              # truncated
+    ],
+)
+def test_probe_rejects_what_it_cannot_read(data):
+    with pytest.raises(mp4meta.NotMP4):
+        mp4meta.probe_bytes(data)
+
+
+@pytest.mark.asyncio
+async def test_probe_range_reads_only_box_headers_and_moov():
+    data = FTYP + box(b"mdat", b"\0" * 1_000_000) + movie()
+    reads = []
+
+    async def read(offset, length):
+        reads.append((offset, length))
+        return data[offset:offset + length]
+
+    info = await mp4meta.probe_range(read, len(data))
+
+    assert info.duration == 12.5
+    assert len(reads) == 4  # ftyp, mdat and moov headers, then the moov body
+    assert sum(length for _, length in reads) < 2000
+
+
+@pytest.mark.asyncio
+async def test_upload_of_mp4_skips_ffprobe(auth_client):
+    data = FTYP + movie(seconds=7.25) + box(b"mdat", b"\0" * 1024)
+
+    with patch("subprocess.run") as mock_run:
+        response = await auth_client.post(
+            "/videos",
+            data={"title": "Native"},
+            files={"file": ("clip.mp4", data, "video/mp4")},
+        )
+
+    assert response.status_code == 200
+    assert response.json()["duration"] == 7.25
+    mock_run.assert_not_called()
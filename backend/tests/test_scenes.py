@@ -0,0 +1,74 @@
+import subprocess
+import sys
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from app.scenes import detect_scenes, frame_scores, pick_cuts, cuts_to_segments, SCAN_HEIGHT, SCAN_WIDTH
+
+
+def _clip(levels, frames_per_level):
+    """Flat gray frames, switching brightness at each new level."""
+    return np.concatenate([
+        np.full((frames_per_level, SCAN_HEIGHT, SCAN_WIDTH), level, dtype=np.uint8)
+        for level in levels
+    ])
+
+
+def test_frame_scores_are_batch_independent():
+    rng = np.random.default_rng(0)
+    frames = rng.integers(0, 256, size=(50, SCAN_HEIGHT, SCAN_WIDTH), dtype=np.uint8)
+
+    whole = frame_scores(frames)
+    batched = np.concatenate([frame_scores(frames[:20]), frame_scores(frames[20:], frames[19])])
+
+    assert np.allclose(whole, batched)
+    assert whole[0] == 0
+
+
+def test_pick_cuts_finds_hard_cuts():
+    frames = _clip([10, 200, 60], frames_per_level=12)
+    cuts = pick_cuts(frame_scores(frames), fps=4, threshold=0.1, min_scene=1.0)
+    assert cuts == [3.0, 6.0]
+
+
+def test_pick_cuts_keeps_stronger_of_close_cuts():
+    scores = np.zeros(40)
+    scores[10] = 0.2
+    scores[11] = 0.5   # closer than min_scene to the previous one, but stronger
+    scores[30] = 0.3
+    assert pick_cuts(scores, fps=4, threshold=0.1, min_scene=2.0) == [2.75, 7.5]
+
+
+def test_cuts_to_segments_covers_whole_video():
+    assert cuts_to_segments([3.0, 6.0], 10.0) == [
+        {"start": 0.0, "end": 3.0},
+        {"start": 3.0, "end": 6.0},
+        {"start": 6.0, "end": 10.0},
+    ]
+    assert cuts_to_segments([], 4.0) == [{"start": 0.0, "end": 4.0}]
+
+
+def _fake_ffmpeg(script):
+    return lambda source, fps: [sys.executable, "-c", script]
+
+
+def test_detect_scenes_survives_chatty_stderr():
+    # far more stderr than a pipe buffer holds, written before any frame
+    script = (
+        "import sys\n"
+        "sys.stderr.write('warning\\n' * 50000); sys.stderr.flush()\n"
+        f"sys.stdout.buffer.write(bytes([10]) * {SCAN_WIDTH * SCAN_HEIGHT * 8})\n"
+        f"sys.stdout.buffer.write(bytes([200]) * {SCAN_WIDTH * SCAN_HEIGHT * 8})\n"
+    )
+    with patch("app.scenes.scan_command", _fake_ffmpeg(script)):
+        cuts, scanned = detect_scenes("clip.mp4", fps=4, min_scene=1.0, timeout=30)
+    assert cuts == [2.0]
+    assert scanned == 4.0
+
+
+def test_detect_scenes_times_out():
+    with patch("app.scenes.scan_command", _fake_ffmpeg("import time; time.sleep(30)")):
+        with pytest.raises(subprocess.TimeoutExpired):
+            detect_scenes("stalled.mp4", timeout=0.2)
@@ -0,0 +1,112 @@
+import asyncio
+import os
+import pytest
+from unittest.mock import patch
+
+from app.scratch import ScratchSpace, ScratchFull, ScratchTooLarge
+
+
+@pytest.mark.asyncio
+async def test_scratch_waits_for_budget_and_cleans_up(tmp_path):
+    scratch = ScratchSpace(tmp_path, budget_bytes=100, max_wait=5)
+    release = asyncio.Event()
+    dirs = []
+
+    async def job(nbytes):
+        async with scratch.reserve(nbytes) as path:
+            (path / "out.mp4").write_bytes(b"x")
+            dirs.append(path)
+            await release.wait()
+
+    first = asyncio.create_task(job(80))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(job(40))
+    await asyncio.sleep(0)
+    assert scratch.stats()["jobs"] == 1
+    assert scratch.stats()["waiting"] == 1
+
+    release.set()
+    await asyncio.gather(first, second)
+
+    assert len(dirs) == 2
+    assert not any(p.exists() for p in dirs)
+    assert scratch.stats()["reserved_bytes"] == 0
+    assert scratch.stats()["peak_reserved_bytes"] == 80
+
+
+@pytest.mark.asyncio
+async def test_scratch_rejects_oversized_and_timed_out_jobs(tmp_path):
+    scratch = ScratchSpace(tmp_path, budget_bytes=100, max_wait=0.05)
+
+    with pytest.raises(ScratchTooLarge):
+        async with scratch.reserve(101):
+            pass
+
+    async with scratch.reserve(100):
+        with pytest.raises(ScratchFull) as exc:
+            async with scratch.reserve(1):
+                pass
+    assert exc.value.status_code == 503
+    assert "Retry-After" in exc.value.headers
+    assert scratch.stats()["rejected"] == 2
+    assert scratch.reserved == 0
+
+
+@pytest.mark.asyncio
+async def test_scratch_cancelled_job_frees_space(tmp_path):
+    scratch = ScratchSpace(tmp_path, budget_bytes=100, max_wait=5)
+    started = asyncio.Event()
+
+    async def job():
+        async with scratch.reserve(100) as path:
+            (path / "partial.mp4").write_bytes(b"x")
+            started.set()
+            await asyncio.sleep(60)
+
+    task = asyncio.create_task(job())
+    await started.wait()
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert scratch.reserved == 0
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_scratch_sweep_removes_orphans_only(tmp_path):
+    scratch = ScratchSpace(tmp_path, budget_bytes=100)
+    mine = tmp_path / f"{os.getpid()}-{scratch.instance}-live"
+    stale_same_pid = tmp_path / f"{os.getpid()}-deadbeef-old"
+    dead = tmp_path / "999999999-cafebabe-old"
+    for d in (mine, stale_same_pid, dead):
+        d.mkdir()
+        (d / "source.mp4").write_bytes(b"12345")
+
+    with patch("app.scratch._pid_alive", return_value=False):
+        freed = scratch.sweep()
+
+    assert freed == 10
+    assert mine.exists()
+    assert not stale_same_pid.exists()
+    assert not dead.exists()
+
+
+@pytest.mark.asyncio
+async def test_split_rejected_when_scratch_budget_too_small(auth_client, mock_subprocess, tmp_path):
+    res = await auth_client.post(
+        "/videos",
+        data={"title": "Big"},
+        files={"file": ("test.mp4", b"content", "video/mp4")},
+    )
+    video_id = res.json()["id"]
+
+    # the stubbed source is 1 KiB; source + cut estimate cannot fit in 1.5 KiB
+    tiny = ScratchSpace(tmp_path, budget_bytes=1536)
+    with patch("app.main.get_scratch", return_value=tiny):
+        response = await auth_client.post(
+            f"/videos/{video_id}/split",
+            json={"segments": [{"start": 0, "end": 10}]},
+        )
+
+    assert response.status_code == 507
+    assert (await auth_client.get(f"/videos/{video_id}")).json()["status"] == "Draft"
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,92 @@
+import asyncio
+import io
+import zipfile
+
+import pytest
+
+from app.zipstream import stream_zip
+
+
+def _source(*chunks, delay=0.0):
+    async def gen():
+        for chunk in chunks:
+            if delay:
+                await asyncio.sleep(delay)
+            yield chunk
+
+    return gen
+
+
+async def _collect(entries, **kwargs) -> bytes:
+    out = bytearray()
+    async for chunk in stream_zip(entries, **kwargs):
+        out += chunk
+    return bytes(out)
+
+
+@pytest.mark.asyncio
+async def test_stream_zip_produces_readable_stored_archive():
+    entries = [
+        ("001_0-5.mp4", _source(b"first ", b"segment")),
+        ("002_5-10.mp4", _source(b"")),
+        ("003_10-15.mp4", _source(b"x" * 70_000, b"y" * 3)),
+    ]
+    data = await _collect(entries, prefetch=2)
+
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        assert zf.testzip() is None
+        assert zf.namelist() == ["001_0-5.mp4", "002_5-10.mp4", "003_10-15.mp4"]
+        assert all(i.compress_type == zipfile.ZIP_STORED for i in zf.infolist())
+        assert zf.read("001_0-5.mp4") == b"first segment"
+        assert zf.read("002_5-10.mp4") == b""
+        assert zf.read("003_10-15.mp4") == b"x" * 70_000 + b"yyy"
+
+
+@pytest.mark.asyncio
+async def test_stream_zip_fetches_entries_concurrently():
+    running = 0
+    peak = 0
+
+    def tracked(payload):
+        async def gen():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            yield payload
+            running -= 1
+
+        return gen
+
+    entries = [(f"{i}.mp4", tracked(b"data")) for i in range(6)]
+    await _collect(entries, prefetch=3)
+    assert peak == 3
+
+
+@pytest.mark.asyncio
+async def test_stream_zip_propagates_source_errors():
+    async def broken():
+        yield b"partial"
+        raise RuntimeError("R2 went away")
+
+    with pytest.raises(RuntimeError, match="R2 went away"):
+        await _collect([("a.mp4", broken)])
+
+
+@pytest.mark.asyncio
+async def test_stream_zip_closed_early_leaves_no_tasks():
+    def endless():
+        async def gen():
+            while True:
+                yield b"x" * 1024
+
+        return gen
+
+    stream = stream_zip([(f"{i}.mp4", endless()) for i in range(3)], prefetch=2, buffer_chunks=1)
+    await stream.__anext__()  # local header of the first entry
+    await stream.__anext__()  # first chunk; its pump is now blocked on a full queue
+    await stream.aclose()
+    await asyncio.sleep(0)
+
+    leftover = [t for t in asyncio.all_tasks() if t is not asyncio.current_task() and not t.done()]
+    assert leftover == []